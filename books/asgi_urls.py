@@ -0,0 +1,13 @@
+"""
+URL configuration used under ASGI (see my_app.middleware): the catalog and
+review reads served by my_app.async_views ahead of everything in books.urls.
+"""
+from django.urls import path, include
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include('my_app.async_urls')),
+
+    *sync_urlpatterns,
+]
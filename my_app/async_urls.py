@@ -0,0 +1,19 @@
+from django.urls import path
+
+from .async_views import AsyncReadView
+
+# Paths read natively under ASGI (books.asgi_urls). Each falls back to the
+# view books.urls routes it to for anything but a list/retrieve GET.
+read_view = AsyncReadView.as_view()
+
+urlpatterns = [
+    path('authors/', read_view),
+    path('authors/<int:pk>/', read_view),
+    path('categories/', read_view),
+    path('categories/<int:pk>/', read_view),
+    path('books/', read_view),
+    path('books/<int:pk>/', read_view),
+
+    path('review/books/<int:book_id>/', read_view),
+    path('review/users/<int:user_id>/', read_view),
+]
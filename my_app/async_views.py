@@ -0,0 +1,124 @@
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404, HttpResponse
+from django.urls import resolve
+from django.utils.decorators import classonlymethod
+from django.views import View
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .cache import CachedReadMixin, catalog_cache
+from .routers import ReplicaReadMixin, replica_reads
+
+
+async def call_cache(func, *args):
+    """
+    Run a catalog cache lookup from the event loop: inline for the in-memory
+    backend, which never blocks, and in a worker thread for the others.
+    """
+    if isinstance(catalog_cache(), LocMemCache):
+        return func(*args)
+    return await sync_to_async(func, thread_sensitive=False)(*args)
+
+
+# ASYNC READ VIEW
+class AsyncReadView(View):
+    """
+    Native async GET for the `list` and `retrieve` actions of the DRF view
+    that ROOT_URLCONF routes the same path to, for the ASGI urlconf
+    (books.asgi_urls). The view's own get_queryset, filters, pagination,
+    serializer, authenticators and response cache are used; the catalog
+    queries go through the async ORM, so no thread is held while a client
+    is slow.
+
+    Anything else (writes, other actions, the browsable API, throttled
+    views) is handed to the DRF view in a thread, as Django would do for a
+    sync view.
+    """
+    # dispatch() handles every method itself, so there are no handlers for
+    # View to tell this apart from a sync view by.
+    view_is_async = True
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # As APIView.as_view: DRF enforces CSRF itself for session auth.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+        if request.method != "GET":
+            return await self.sync_response(match, request)
+
+        view = match.func.cls(**match.func.initkwargs)
+        view.action_map = getattr(match.func, "actions", {"get": "list"})
+        view.setup(request, *match.args, **match.kwargs)
+
+        drf_request = view.initialize_request(request, *match.args, **match.kwargs)
+        view.request = drf_request
+        view.headers = view.default_response_headers
+
+        try:
+            view.format_kwarg = view.get_format_suffix(**match.kwargs)
+            drf_request.accepted_renderer, drf_request.accepted_media_type = view.perform_content_negotiation(drf_request)
+
+            if (
+                view.action_map.get("get") not in ("list", "retrieve")
+                or not isinstance(drf_request.accepted_renderer, JSONRenderer)
+                or view.get_throttles()
+            ):
+                return await self.sync_response(match, request)
+
+            drf_request.version, drf_request.versioning_scheme = view.determine_version(drf_request, *match.args, **match.kwargs)
+            # The authenticators query the database: run them in a thread.
+            await sync_to_async(view.perform_authentication)(drf_request)
+            view.check_permissions(drf_request)
+
+            with replica_reads(isinstance(view, ReplicaReadMixin)):
+                response = await self.read(view, drf_request)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        response = view.finalize_response(drf_request, response, *match.args, **match.kwargs)
+        response.render()
+
+        # A plain response, so the handler doesn't go to a thread to render it.
+        return HttpResponse(response.content, status=response.status_code, headers=response.headers)
+
+    async def sync_response(self, match, request):
+        return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+    async def read(self, view, request):
+        if not isinstance(view, CachedReadMixin):
+            return await self.read_uncached(view, request)
+
+        digest, response = await call_cache(view.cache_lookup, request)
+        if response is None:
+            response = await self.read_uncached(view, request)
+            await call_cache(view.cache_store, digest, response)
+
+        return response
+
+    async def read_uncached(self, view, request):
+        queryset = view.filter_queryset(view.get_queryset())
+
+        if view.action_map["get"] == "retrieve":
+            lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+            try:
+                instance = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+            except (queryset.model.DoesNotExist, TypeError, ValueError):
+                raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+            view.check_object_permissions(request, instance)
+            return Response(view.get_serializer(instance).data)
+
+        if view.paginator is not None:
+            page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+            if page is not None:
+                return view.get_paginated_response(view.get_serializer(page, many=True).data)
+
+        items = [item async for item in queryset]
+        return Response(view.get_serializer(items, many=True).data)
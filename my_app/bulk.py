@@ -0,0 +1,154 @@
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+
+from .models import Author, Book, Category
+from .search import index_books
+from .serializers import BookBulkSerializer
+
+CHUNK_SIZE = 500
+
+# Bulk item fields and the model attributes they are written to.
+BOOK_COLUMNS = {"name": "name", "description": "description", "author": "author_id", "category": "category_id"}
+
+
+def chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def validate_chunk(items, offset, partial=False):
+    """
+    Validate one chunk of bulk items with a single serializer instance.
+    Returns the valid `(index, data)` pairs and the per-item errors.
+    """
+    serializer = BookBulkSerializer(partial=partial)
+    valid, errors = [], []
+
+    for index, item in enumerate(items, start=offset):
+        try:
+            data = serializer.run_validation(item)
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": exc.detail})
+            continue
+
+        if partial and "id" not in data:
+            errors.append({"index": index, "errors": {"id": ["This field is required."]}})
+            continue
+
+        valid.append((index, data))
+
+    valid, fk_errors = check_foreign_keys(valid)
+    return valid, errors + fk_errors
+
+
+def check_foreign_keys(valid):
+    """Drop items pointing at missing authors or categories, one query per model."""
+    author_ids = {data["author"] for _, data in valid if "author" in data}
+    category_ids = {data["category"] for _, data in valid if data.get("category") is not None}
+
+    authors = set(Author.objects.filter(id__in=author_ids).values_list("id", flat=True)) if author_ids else set()
+    categories = set(Category.objects.filter(id__in=category_ids).values_list("id", flat=True)) if category_ids else set()
+
+    checked, errors = [], []
+    for index, data in valid:
+        item_errors = {}
+        if "author" in data and data["author"] not in authors:
+            item_errors["author"] = [f'Invalid pk "{data["author"]}" - object does not exist.']
+        if data.get("category") is not None and data["category"] not in categories:
+            item_errors["category"] = [f'Invalid pk "{data["category"]}" - object does not exist.']
+
+        if item_errors:
+            errors.append({"index": index, "errors": item_errors})
+        else:
+            checked.append((index, data))
+
+    return checked, errors
+
+
+def bulk_create_books(user, items):
+    created, errors = [], []
+
+    for offset, chunk in chunks(items):
+        valid, chunk_errors = validate_chunk(chunk, offset)
+        errors += chunk_errors
+        if not valid:
+            continue
+
+        with transaction.atomic():
+            books = Book.objects.bulk_create(
+                Book(user=user, **{BOOK_COLUMNS[key]: value for key, value in data.items() if key in BOOK_COLUMNS})
+                for _, data in valid
+            )
+            index_books(book_ids=[book.id for book in books])
+
+        created += [book.id for book in books]
+
+    return created, errors
+
+
+def bulk_update_books(items):
+    updated, errors = [], []
+
+    for offset, chunk in chunks(items):
+        valid, chunk_errors = validate_chunk(chunk, offset, partial=True)
+        errors += chunk_errors
+
+        books = Book.objects.in_bulk([data["id"] for _, data in valid])
+        changed, columns = [], set()
+        for index, data in valid:
+            book = books.get(data["id"])
+            if book is None:
+                errors.append({"index": index, "errors": {"id": ["Not found."]}})
+                continue
+
+            for key, value in data.items():
+                if key in BOOK_COLUMNS:
+                    setattr(book, BOOK_COLUMNS[key], value)
+                    columns.add(BOOK_COLUMNS[key])
+            changed.append(book)
+
+        if not changed:
+            continue
+
+        # bulk_update() skips auto_now, so stamp updated_at explicitly.
+        now = timezone.now()
+        for book in changed:
+            book.updated_at = now
+
+        with transaction.atomic():
+            Book.objects.bulk_update(changed, sorted(columns | {"updated_at"}))
+            index_books(book_ids=[book.id for book in changed])
+
+        updated += [book.id for book in changed]
+
+    return updated, errors
+
+
+def bulk_delete_books(ids):
+    deleted, errors = [], []
+
+    for offset, chunk in chunks(ids):
+        requested = {}
+        for index, book_id in enumerate(chunk, start=offset):
+            if isinstance(book_id, int) and not isinstance(book_id, bool):
+                requested[index] = book_id
+            else:
+                errors.append({"index": index, "errors": {"id": ["A valid integer is required."]}})
+
+        existing = set(Book.objects.filter(id__in=requested.values()).values_list("id", flat=True))
+        errors += [
+            {"index": index, "errors": {"id": ["Not found."]}}
+            for index, book_id in requested.items() if book_id not in existing
+        ]
+        if not existing:
+            continue
+
+        # Goes through the collector so review, search and cache signals run.
+        with transaction.atomic():
+            Book.objects.filter(id__in=existing).delete()
+
+        deleted += sorted(existing)
+
+    return deleted, errors
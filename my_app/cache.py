@@ -0,0 +1,112 @@
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import reads_from_replicas
+
+
+def catalog_cache():
+    return caches[settings.CATALOG_CACHE]
+
+
+def version_key(model_name):
+    return f"catalog:version:{model_name}"
+
+
+def get_versions(model_names):
+    """
+    Current version token of each model, in order. A missing token (never
+    set, or evicted) is replaced by a fresh one, so entries cached under an
+    old token can never be served again.
+    """
+    cache = catalog_cache()
+    keys = [version_key(name) for name in model_names]
+    versions = cache.get_many(keys)
+
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, secrets.token_hex(8), timeout=None)
+        versions.update(cache.get_many(missing))
+
+    return [versions[key] for key in keys]
+
+
+def bump_version(model_name):
+    """
+    Invalidate everything cached against `model_name`. The bump is repeated
+    after commit so a read racing the write can't cache pre-commit data
+    under the new version.
+    """
+    def bump():
+        catalog_cache().set(version_key(model_name), secrets.token_hex(8), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+class CachedReadMixin:
+    """
+    Read-through cache and conditional GETs for `list` and `retrieve`.
+
+    Entries and ETags are keyed by the request URI, the negotiated media
+    type and the versions of `cache_models`, so any write to one of those
+    models makes older entries unreachable (the cache backend's LRU eviction
+    reclaims them) and changes the ETag. Revalidating costs one cache lookup
+    and no queries or serialization.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_digest(self, request):
+        versions = get_versions(self.cache_models)
+        # Replica reads may lag the primary: keep them apart from what a
+        # client that just wrote reads back (see my_app.routers).
+        source = "replica" if reads_from_replicas() else "primary"
+        # The absolute URI: paginated responses link to their own host.
+        parts = [request.build_absolute_uri(), request.accepted_media_type or "", source, *versions]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def cached_response(self, action, request, *args, **kwargs):
+        digest, response = self.cache_lookup(request)
+        if response is None:
+            response = action(request, *args, **kwargs)
+            self.cache_store(digest, response)
+
+        return response
+
+    def cache_lookup(self, request):
+        """The request's cache digest, and a 304 or the cached response if there is one."""
+        digest = self.get_cache_digest(request)
+        etag = quote_etag(digest)
+
+        # `*` is not honoured: the resource hasn't been looked up yet.
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return digest, Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = catalog_cache().get(f"catalog:response:{digest}")
+        if data is not None:
+            return digest, Response(data, headers={"ETag": etag})
+
+        return digest, None
+
+    def cache_store(self, digest, response):
+        if response.status_code == status.HTTP_200_OK:
+            # A lagging replica can return rows older than the current
+            # versions: keep those no longer than a writer stays pinned.
+            timeout = getattr(settings, "READ_YOUR_WRITES_SECONDS", 5) if reads_from_replicas() else None
+            catalog_cache().set(f"catalog:response:{digest}", response.data, timeout=timeout)
+            response["ETag"] = quote_etag(digest)
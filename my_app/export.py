@@ -0,0 +1,46 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_COLUMNS = [
+    "id", "name", "description", "avg_rating", "number_rating", "updated_at",
+    "author_id", "author__name", "category_id", "category__name",
+]
+CHUNK_SIZE = 2000
+
+
+def export_books(queryset):
+    """
+    Yield the books of `queryset` as NDJSON lines. Rows are read with a
+    chunked iterator over a flat values() join, so memory stays flat however
+    large the catalog is.
+    """
+    encoder = DjangoJSONEncoder()
+    for row in export_rows(queryset).iterator(chunk_size=CHUNK_SIZE):
+        yield export_line(encoder, row)
+
+
+async def aexport_books(queryset):
+    """export_books() through the async ORM, for streaming under ASGI."""
+    encoder = DjangoJSONEncoder()
+    async for row in export_rows(queryset).aiterator(chunk_size=CHUNK_SIZE):
+        yield export_line(encoder, row)
+
+
+def export_rows(queryset):
+    return queryset.values(*EXPORT_COLUMNS).order_by("id")
+
+
+def export_line(encoder, row):
+    book = {
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "author": {"id": row["author_id"], "name": row["author__name"]},
+        "category": (
+            {"id": row["category_id"], "name": row["category__name"]}
+            if row["category_id"] is not None else None
+        ),
+        "avg_rating": row["avg_rating"],
+        "number_rating": row["number_rating"],
+        "updated_at": row["updated_at"],
+    }
+    return encoder.encode(book).encode() + b"\n"
@@ -0,0 +1,118 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from my_app.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec of the WSGI handler (a fixed pool of worker threads) "
+        "with the ASGI handler (one event loop) on the catalog and review reads, "
+        "in process and against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--paths", nargs="+", help="Paths to request in turn. Defaults to a book list, detail and review list.")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=200, help="Clients with a request in flight at once.")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads.")
+        parser.add_argument("--client-delay", type=float, default=0.0, help="Seconds each client takes to read its response.")
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or self.default_paths()
+        urls = [urlsplit(paths[i % len(paths)]) for i in range(options["requests"])]
+
+        self.stdout.write(f"{'handler':<8}  {'requests':>8}  {'req/s':>8}  {'p50 ms':>8}  {'p99 ms':>8}  statuses")
+        for name, run in (("wsgi", self.run_wsgi), ("asgi", self.run_asgi)):
+            # One untimed pass to fill the response cache and open connections.
+            run(urls[:len(paths)], options)
+
+            started = time.perf_counter()
+            results = run(urls, options)
+            elapsed = time.perf_counter() - started
+
+            latencies = sorted(latency for _, latency in results)
+            statuses = Counter(status for status, _ in results)
+            self.stdout.write(
+                f"{name:<8}  {len(results):>8}  {len(results) / elapsed:>8.0f}  "
+                f"{statistics.median(latencies) * 1000:>8.1f}  {latencies[int(len(latencies) * 0.99)] * 1000:>8.1f}  "
+                + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+            )
+
+    def default_paths(self):
+        book_id = Book.objects.order_by("id").values_list("id", flat=True).first() or 1
+        return ["/api/books/?page_size=20", f"/api/books/{book_id}/", f"/api/review/books/{book_id}/?page_size=20"]
+
+    def run_wsgi(self, urls, options):
+        handler = WSGIHandler()
+
+        def request(url):
+            started = time.perf_counter()
+            environ = {
+                "REQUEST_METHOD": "GET", "PATH_INFO": url.path, "QUERY_STRING": url.query,
+                "SERVER_NAME": options["host"], "SERVER_PORT": "80", "HTTP_HOST": options["host"],
+                "HTTP_ACCEPT": "application/json", "REMOTE_ADDR": "127.0.0.1",
+                "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr, "wsgi.url_scheme": "http",
+            }
+            statuses = []
+            response = handler(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+            b"".join(response)
+            response.close()
+            # A slow client keeps the worker thread busy while it reads.
+            time.sleep(options["client_delay"])
+            return statuses[0], time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            return list(pool.map(request, urls))
+
+    def run_asgi(self, urls, options):
+        handler = ASGIHandler()
+        slots = None
+
+        async def request(url):
+            async with slots:
+                started = time.perf_counter()
+                scope = {
+                    "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                    "method": "GET", "scheme": "http", "path": url.path, "raw_path": url.path.encode(),
+                    "query_string": url.query.encode(), "root_path": "",
+                    "headers": [(b"host", options["host"].encode()), (b"accept", b"application/json")],
+                    "client": ("127.0.0.1", 0), "server": (options["host"], 80),
+                }
+                received = asyncio.Event()
+                statuses = []
+
+                async def receive():
+                    if not received.is_set():
+                        received.set()
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    # The client stays connected until the response is sent.
+                    await asyncio.Future()
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        statuses.append(message["status"])
+                    elif not message.get("more_body"):
+                        # A slow client only holds a suspended coroutine.
+                        await asyncio.sleep(options["client_delay"])
+
+                await handler(scope, receive, send)
+                return statuses[0], time.perf_counter() - started
+
+        async def run():
+            nonlocal slots
+            slots = asyncio.Semaphore(options["concurrency"])
+            return await asyncio.gather(*(request(url) for url in urls))
+
+        return asyncio.run(run())
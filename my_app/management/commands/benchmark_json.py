@@ -0,0 +1,73 @@
+import io
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from my_app import parsers, renderers
+from my_app.models import Book
+from my_app.serializers import BookSerializer
+
+
+def book_page(size):
+    """A `/api/books/` response body of `size` books, built without the database."""
+    user = get_user_model()(id=1, username="admin")
+    books = [
+        Book(
+            id=i, user=user, name=f"Book {i}", description=f"The description of book number {i}",
+            author_id=i % 500 + 1, category_id=i % 20 + 1 if i % 7 else None,
+            rating_1=i % 3, rating_2=i % 5, rating_3=i % 7, rating_4=i % 11, rating_5=i % 13,
+            number_rating=i % 39, avg_rating=(i % 400) / 100 + 1,
+        )
+        for i in range(1, size + 1)
+    ]
+    return {"next": "http://testserver/api/books/?cursor=cD0xMDA%3D", "previous": None,
+            "results": BookSerializer(books, many=True).data}
+
+
+def measure(func, repeat):
+    """Best wall time of `repeat` calls, and the peak memory allocated by one call."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's stdlib JSON renderer and parser with the orjson-backed ones on book list responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Books per response.")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write("orjson is not installed: the fast renderer and parser fall back to the stdlib.")
+
+        self.stdout.write(f"{'books':>7}  {'step':<6}  {'stdlib ms':>10}  {'fast ms':>8}  {'speedup':>7}  {'stdlib KiB':>10}  {'fast KiB':>9}")
+        for size in options["sizes"]:
+            data = book_page(size)
+            body = JSONRenderer().render(data)
+
+            steps = [
+                ("render", lambda: JSONRenderer().render(data), lambda: renderers.FastJSONRenderer().render(data)),
+                ("parse", lambda: JSONParser().parse(io.BytesIO(body)), lambda: parsers.FastJSONParser().parse(io.BytesIO(body))),
+            ]
+            for name, stdlib, fast in steps:
+                stdlib_time, stdlib_peak = measure(stdlib, options["repeat"])
+                fast_time, fast_peak = measure(fast, options["repeat"])
+                self.stdout.write(
+                    f"{size:>7}  {name:<6}  {stdlib_time * 1000:>10.1f}  {fast_time * 1000:>8.1f}  "
+                    f"{stdlib_time / fast_time:>6.1f}x  {stdlib_peak / 1024:>10,.0f}  {fast_peak / 1024:>9,.0f}"
+                )
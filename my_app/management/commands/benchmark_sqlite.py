@@ -0,0 +1,162 @@
+import io
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+from rest_framework.authtoken.models import Token
+
+from my_app.cache import catalog_cache
+from my_app.models import Book
+
+# Django's defaults for an SQLite database: rollback journal, deferred
+# transactions, and a new connection for every request.
+STOCK_PROFILE = {"OPTIONS": {}, "CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stock SQLite configuration with the tuned one (SQLITE_OPTIONS, "
+        "SQLITE_CONN_MAX_AGE) under concurrent book reads and review writes, through "
+        "the WSGI handler on copies of the default database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of requests that post a review.")
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        database = connections.settings["default"]
+        if database["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("The default database isn't SQLite.")
+
+        book_ids = list(Book.objects.order_by("id").values_list("id", flat=True)[:5000])
+        if not book_ids:
+            raise CommandError("No books to read and review: load some with import_catalog first.")
+
+        profiles = [
+            ("stock", STOCK_PROFILE),
+            ("tuned", {"OPTIONS": settings.SQLITE_OPTIONS, "CONN_MAX_AGE": settings.SQLITE_CONN_MAX_AGE, "CONN_HEALTH_CHECKS": True}),
+        ]
+        # Review posts are throttled per user; the benchmark is about the database.
+        rest_framework = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+
+        self.stdout.write(f"{'profile':<8}  {'requests':>8}  {'req/s':>7}  {'read p50 ms':>11}  {'write p50 ms':>12}  statuses")
+        # Failed requests ("database is locked") are counted, not logged.
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+        connections.close_all()
+        saved = dict(database)
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(DEBUG=False, ALLOWED_HOSTS=[options["host"]], REST_FRAMEWORK=rest_framework):
+            for name, profile in profiles:
+                path = os.path.join(directory, f"{name}.sqlite3")
+                self.copy_database(saved["NAME"], path, wal=name != "stock")
+                database.update(NAME=path, **profile)
+                try:
+                    tokens = self.create_clients(options["threads"])
+                    catalog_cache().clear()
+                    self.report(name, self.run(tokens, book_ids, options))
+                finally:
+                    connections.close_all()
+                    database.clear()
+                    database.update(saved)
+
+    def copy_database(self, source, path, wal):
+        with sqlite3.connect(source) as origin, sqlite3.connect(path) as copy:
+            origin.backup(copy)
+            copy.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+
+    def create_clients(self, count):
+        """One user and token per thread, so each posts its own reviews."""
+        User = get_user_model()
+        suffix = os.urandom(4).hex()
+        users = User.objects.bulk_create([
+            User(username=f"bench-{suffix}-{i}", email=f"bench-{suffix}-{i}@example.com", name="Benchmark", password=make_password(None))
+            for i in range(count)
+        ])
+        tokens = Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+        return [token.key for token in tokens]
+
+    def run(self, tokens, book_ids, options):
+        handler = WSGIHandler()
+        per_thread = options["requests"] // len(tokens)
+        results = []
+        lock = threading.Lock()
+
+        def client(index, token):
+            rng = random.Random(index)
+            own_books = book_ids[index::len(tokens)] or book_ids
+            done = []
+            for i in range(per_thread):
+                if rng.random() < options["write_ratio"]:
+                    book_id = own_books[i % len(own_books)]
+                    body = json.dumps({"rating": rng.randint(1, 5), "comment": "Benchmark review"}).encode()
+                    path, kind, extra = f"/api/review/books/{book_id}/", "write", {"HTTP_AUTHORIZATION": f"Token {token}"}
+                else:
+                    book_id = rng.choice(book_ids)
+                    body, kind, extra = b"", "read", {}
+                    path = rng.choice([
+                        "/api/books/", f"/api/books/{book_id}/", f"/api/review/books/{book_id}/",
+                    ])
+
+                started = time.perf_counter()
+                status = self.request(handler, options["host"], path, body, extra)
+                done.append((kind, status, time.perf_counter() - started))
+
+            # Persistent connections belong to this thread; close them with it.
+            connections.close_all()
+            with lock:
+                results.extend(done)
+
+        threads = [threading.Thread(target=client, args=(index, token)) for index, token in enumerate(tokens)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - started
+
+    def request(self, handler, host, path, body, extra):
+        environ = {
+            "REQUEST_METHOD": "POST" if body else "GET", "PATH_INFO": path, "QUERY_STRING": "",
+            "SERVER_NAME": host, "SERVER_PORT": "80", "HTTP_HOST": host, "HTTP_ACCEPT": "application/json",
+            "REMOTE_ADDR": "127.0.0.1", "CONTENT_TYPE": "application/json", "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body), "wsgi.errors": sys.stderr, "wsgi.url_scheme": "http",
+            **extra,
+        }
+        statuses = []
+        response = handler(environ, lambda status, headers: statuses.append(int(status.split()[0])))
+        b"".join(response)
+        response.close()
+        return statuses[0]
+
+    def report(self, name, run):
+        results, elapsed = run
+
+        def median_ms(kind):
+            latencies = [latency for k, _, latency in results if k == kind]
+            return statistics.median(latencies) * 1000 if latencies else 0.0
+
+        statuses = Counter(status for _, status, _ in results)
+        self.stdout.write(
+            f"{name:<8}  {len(results):>8}  {len(results) / elapsed:>7.0f}  {median_ms('read'):>11.1f}  {median_ms('write'):>12.1f}  "
+            + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        )
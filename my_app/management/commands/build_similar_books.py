@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from my_app import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the similar books table from the Review table: each book's "
+        "top-k neighbours by adjusted cosine similarity of their ratings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=50, help="Neighbours stored per book.")
+        parser.add_argument("--min-common", type=int, default=2, help="Users two books need in common to be compared.")
+        parser.add_argument("--block-size", type=int, help="Books per matrix product block (default: fit the memory budget).")
+
+    def handle(self, *args, **options):
+        if recommendations.np is None:
+            raise CommandError("NumPy and SciPy are required: pip install numpy scipy")
+
+        started = time.perf_counter()
+        stored = recommendations.rebuild_similar_books(
+            k=options["top_k"], min_common=options["min_common"], block_size=options["block_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored {stored} similar book pairs in {time.perf_counter() - started:.1f}s.")
+        )
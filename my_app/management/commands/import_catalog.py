@@ -0,0 +1,204 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from my_app.cache import bump_version
+from my_app.models import Author, Book, Category, Review
+from my_app.recommendations import user_version
+from my_app.search import index_books
+
+
+def read_rows(path):
+    """Stream dict rows from a .csv or .jsonl/.ndjson file."""
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif path.suffix in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise CommandError(f"{path}: expected a .csv, .jsonl or .ndjson file")
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def optional_id(value):
+    return None if value in (None, "") else str(value)
+
+
+def parse_rating(value):
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load authors, categories, books and reviews from CSV or JSONL files. "
+        "Rows reference each other by the `id` column of the imported files, "
+        "falling back to the ids of rows already in the database; reviews "
+        "reference existing users by username."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", help="Rows: id, name, country, date_of_birth")
+        parser.add_argument("--categories", help="Rows: id, name, description")
+        parser.add_argument("--books", help="Rows: id, name, description, author, category")
+        parser.add_argument("--reviews", help="Rows: user, book, rating, comment")
+        parser.add_argument("--user", help="Username that owns imported authors and books (default: first superuser)")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.owner = self.get_owner(options["user"])
+        self.authors, self.categories, self.books = {}, {}, {}
+
+        steps = [
+            ("authors", self.import_authors),
+            ("categories", self.import_categories),
+            ("books", self.import_books),
+            ("reviews", self.import_reviews),
+        ]
+        for name, step in steps:
+            if options[name]:
+                self.run_step(name, step, options[name])
+
+        for model_name in ("author", "category", "book", "review"):
+            bump_version(model_name)
+
+    def get_owner(self, username):
+        users = get_user_model().objects
+        if username:
+            try:
+                return users.get(username=username)
+            except users.model.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist")
+
+        owner = users.filter(is_superuser=True).order_by("id").first()
+        if owner is None:
+            raise CommandError("No superuser to own the imported rows; pass --user")
+        return owner
+
+    def run_step(self, name, step, path):
+        started = time.perf_counter()
+        imported = skipped = 0
+
+        for batch in batches(read_rows(path), self.batch_size):
+            with transaction.atomic():
+                done = step(batch)
+            imported += done
+            skipped += len(batch) - done
+
+        elapsed = time.perf_counter() - started
+        rate = imported / elapsed if elapsed else imported
+        self.stdout.write(
+            f"{name}: imported {imported}, skipped {skipped} in {elapsed:.1f}s ({rate:,.0f} rows/sec)"
+        )
+
+    def resolve(self, mapping, model, keys):
+        """
+        Add existing database rows to `mapping` for keys that weren't imported
+        in this run, in one query per batch.
+        """
+        missing = {key for key in keys if key is not None and key not in mapping and key.isdigit()}
+        if missing:
+            mapping.update((str(pk), pk) for pk in model.objects.filter(pk__in=missing).values_list("pk", flat=True))
+
+    def import_authors(self, rows):
+        authors = Author.objects.bulk_create(
+            Author(
+                user=self.owner,
+                name=row["name"],
+                country=row.get("country") or "",
+                date_of_birth=parse_date(row["date_of_birth"]) if row.get("date_of_birth") else None,
+            )
+            for row in rows
+        )
+        self.authors.update((str(row["id"]), author.id) for row, author in zip(rows, authors))
+        return len(authors)
+
+    def import_categories(self, rows):
+        categories = Category.objects.bulk_create(
+            Category(name=row["name"], description=row.get("description") or "") for row in rows
+        )
+        self.categories.update((str(row["id"]), category.id) for row, category in zip(rows, categories))
+        return len(categories)
+
+    def import_books(self, rows):
+        self.resolve(self.authors, Author, {str(row["author"]) for row in rows})
+        self.resolve(self.categories, Category, {optional_id(row.get("category")) for row in rows})
+
+        resolved = [
+            row for row in rows
+            if str(row["author"]) in self.authors
+            and (optional_id(row.get("category")) is None or optional_id(row.get("category")) in self.categories)
+        ]
+
+        books = Book.objects.bulk_create(
+            Book(
+                user=self.owner,
+                name=row["name"],
+                description=row.get("description") or "",
+                author_id=self.authors[str(row["author"])],
+                category_id=self.categories.get(optional_id(row.get("category"))),
+            )
+            for row in resolved
+        )
+        self.books.update((str(row["id"]), book.id) for row, book in zip(resolved, books))
+        index_books(book_ids=[book.id for book in books])
+        return len(books)
+
+    def import_reviews(self, rows):
+        usernames = {row["user"] for row in rows}
+        users = dict(get_user_model().objects.filter(username__in=usernames).values_list("username", "id"))
+        self.resolve(self.books, Book, {str(row["book"]) for row in rows})
+
+        # One review per (book, user): drop pairs already in the database or
+        # earlier in the batch, so they are reported as skipped.
+        candidates = [
+            (users[row["user"]], self.books[str(row["book"])], row)
+            for row in rows
+            if row["user"] in users and str(row["book"]) in self.books and parse_rating(row["rating"])
+        ]
+        reviewed = set(
+            Review.objects.filter(
+                user_id__in={user_id for user_id, _, _ in candidates},
+                book_id__in={book_id for _, book_id, _ in candidates},
+            ).values_list("user_id", "book_id")
+        )
+
+        reviews = []
+        for user_id, book_id, row in candidates:
+            if (user_id, book_id) in reviewed:
+                continue
+            reviewed.add((user_id, book_id))
+            reviews.append(Review(
+                user_id=user_id,
+                book_id=book_id,
+                rating=parse_rating(row["rating"]),
+                comment=row.get("comment") or None,
+            ))
+
+        # A review written concurrently is still left to the unique constraint.
+        Review.objects.bulk_create(reviews, ignore_conflicts=True)
+
+        # bulk_create skips the review signals: rebuild the touched books' ratings in one pass.
+        Book.objects.recompute_ratings({review.book_id for review in reviews})
+        for user_id in {review.user_id for review in reviews}:
+            bump_version(user_version(user_id))
+        return len(reviews)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from my_app.cache import bump_version
+from my_app.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Set the prior of Book.weighted_rating to the current catalog-wide mean "
+        "rating and re-score every book. Meant to run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tolerance", type=float, default=getattr(settings, "RATING_PRIOR_TOLERANCE", 0.01),
+            help="Leave the books alone unless the mean moved by more than this.",
+        )
+
+    def handle(self, *args, **options):
+        mean = Book.objects.refresh_rating_prior(tolerance=options["tolerance"])
+        if mean is None:
+            self.stdout.write("Prior mean unchanged; books left as they are.")
+            return
+
+        bump_version("book")
+        self.stdout.write(self.style.SUCCESS(f"Prior mean set to {mean:.3f}; re-scored all books."))
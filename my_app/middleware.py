@@ -0,0 +1,59 @@
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import is_pinned, pin, pinned_to_primary, replica_aliases
+
+
+@sync_and_async_middleware
+def asgi_urlconf_middleware(get_response):
+    """
+    Route requests served under ASGI through ASGI_URLCONF, which swaps in
+    the async read views. The middleware chain is only async under ASGI, so
+    WSGI requests keep ROOT_URLCONF and never start an event loop.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            urlconf = getattr(settings, "ASGI_URLCONF", None)
+            if urlconf:
+                request.urlconf = urlconf
+            return await get_response(request)
+    else:
+        def middleware(request):
+            return get_response(request)
+
+    return middleware
+
+
+@sync_and_async_middleware
+def read_your_writes_middleware(get_response):
+    """
+    Pin a client's reads to the primary database while its request writes
+    and for READ_YOUR_WRITES_SECONDS afterwards, so it never reads a replica
+    that hasn't caught up with its own changes (see my_app.routers).
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not replica_aliases():
+                return await get_response(request)
+
+            with pinned_to_primary(is_pinned(request)):
+                response = await get_response(request)
+            if request.method not in SAFE_METHODS:
+                pin(request)
+            return response
+    else:
+        def middleware(request):
+            if not replica_aliases():
+                return get_response(request)
+
+            with pinned_to_primary(is_pinned(request)):
+                response = get_response(request)
+            if request.method not in SAFE_METHODS:
+                pin(request)
+            return response
+
+    return middleware
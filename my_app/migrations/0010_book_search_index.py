@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# FTS5 index over Book.name, Book.description and Author.name, keyed by book
+# id. It is kept in sync from my_app.signals rather than with SQL triggers:
+# SQLite drops a table's triggers whenever Django remakes it in a migration.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS my_app_book_fts USING fts5(
+        name, description, author_name, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO my_app_book_fts (rowid, name, description, author_name)
+    SELECT b.id, b.name, b.description, a.name
+    FROM my_app_book b JOIN my_app_author a ON a.id = b.author_id
+    """,
+]
+
+DROP_SQL = [
+    "DROP TABLE IF EXISTS my_app_book_fts",
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_app', '0009_rename_subject_book_description'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_app', '0010_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['avg_rating', 'number_rating'], name='book_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['category', 'avg_rating', 'number_rating'], name='book_category_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'avg_rating', 'number_rating'], name='book_author_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:34
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def backfill_histogram(apps, schema_editor):
+    Book = apps.get_model('my_app', 'Book')
+    Review = apps.get_model('my_app', 'Review')
+    db_alias = schema_editor.connection.alias
+
+    def star_count(star):
+        reviews = (
+            Review.objects.using(db_alias).filter(book=OuterRef('pk'), rating=star)
+            .order_by().values('book').annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(reviews), 0)
+
+    Book.objects.using(db_alias).update(**{f'rating_{star}': star_count(star) for star in range(1, 6)})
+
+    total = sum(F(f'rating_{star}') for star in range(1, 6))
+    weighted = sum(star * F(f'rating_{star}') for star in range(1, 6))
+    Book.objects.using(db_alias).update(
+        number_rating=total,
+        avg_rating=Coalesce(Cast(weighted, FloatField()) / NullIf(total, 0), Value(0.0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_app', '0011_book_rating_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """Keep each user's first review of a book and re-derive the affected ratings."""
+    Book = apps.get_model('my_app', 'Book')
+    Review = apps.get_model('my_app', 'Review')
+    db_alias = schema_editor.connection.alias
+
+    duplicates = (
+        Review.objects.using(db_alias).values('book', 'user')
+        .annotate(first=Min('id'), n=Count('id'))
+        .filter(n__gt=1)
+    )
+
+    book_ids = set()
+    for duplicate in duplicates:
+        Review.objects.using(db_alias).filter(book=duplicate['book'], user=duplicate['user']).exclude(id=duplicate['first']).delete()
+        book_ids.add(duplicate['book'])
+
+    if not book_ids:
+        return
+
+    def star_count(star):
+        reviews = (
+            Review.objects.using(db_alias).filter(book=OuterRef('pk'), rating=star)
+            .order_by().values('book').annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(reviews), 0)
+
+    books = Book.objects.using(db_alias).filter(id__in=book_ids)
+    books.update(**{f'rating_{star}': star_count(star) for star in range(1, 6)})
+
+    total = sum(F(f'rating_{star}') for star in range(1, 6))
+    weighted = sum(star * F(f'rating_{star}') for star in range(1, 6))
+    books.update(
+        number_rating=total,
+        avg_rating=Coalesce(Cast(weighted, FloatField()) / NullIf(total, 0), Value(0.0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_app', '0012_book_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('book', 'user'), name='unique_review_per_book_user'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+
+def backfill_weighted_rating(apps, schema_editor):
+    Book = apps.get_model('my_app', 'Book')
+    RatingPrior = apps.get_model('my_app', 'RatingPrior')
+    db_alias = schema_editor.connection.alias
+
+    total = sum(F(f'rating_{star}') for star in range(1, 6))
+    weighted = sum(star * F(f'rating_{star}') for star in range(1, 6))
+
+    totals = Book.objects.using(db_alias).aggregate(total=Sum(total), weighted=Sum(weighted))
+    mean = totals['weighted'] / totals['total'] if totals['total'] else float(getattr(settings, 'RATING_PRIOR_MEAN', 3.0))
+    RatingPrior.objects.using(db_alias).create(pk=1, mean=mean)
+
+    votes = getattr(settings, 'RATING_PRIOR_VOTES', 10)
+    Book.objects.using(db_alias).update(
+        weighted_rating=Case(
+            When(number_rating=0, then=Value(0.0)),
+            default=(Cast(weighted, FloatField()) + votes * mean) / (total + votes),
+            output_field=FloatField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_app', '0014_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingPrior',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='weighted_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_weighted_rating, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['weighted_rating', 'number_rating'], name='book_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['category', 'weighted_rating', 'number_rating'], name='book_category_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'weighted_rating', 'number_rating'], name='book_author_weighted_idx'),
+        ),
+    ]
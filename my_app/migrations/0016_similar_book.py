@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_app', '0015_book_weighted_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarBook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('book', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='my_app.book')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='my_app.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['book', 'score'], name='similar_book_score_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,9 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Abs, Cast, Coalesce, Now, NullIf
+from django.db.models.lookups import Exact
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import (
@@ -7,6 +12,8 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from user.hashing import password_pool
+
 # USER
 class UserManager(BaseUserManager):
     def create_user(self, username, email, password=None, **extra_fields):
@@ -43,6 +50,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'name']
 
+    # Hash and verify on the password pool (user.hashing) rather than on the
+    # request thread: registration, login (via authenticate) and updates.
+    def set_password(self, raw_password):
+        self.password = password_pool.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        valid, upgrade = password_pool.check_password(raw_password, self.password)
+        if valid and upgrade:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+        return valid
+
 
 # AUTHOR
 class Author(models.Model):
@@ -67,6 +88,131 @@ class Category(models.Model):
         return self.name
 
 # BOOK
+STARS = range(1, 6)
+
+# Best rated first. The book rating indexes cover it (SQLite appends the rowid
+# to every index), so a leaderboard of k books reads k index entries.
+LEADERBOARD_ORDERING = ["-weighted_rating", "-number_rating", "-id"]
+
+
+def default_prior_mean():
+    return float(getattr(settings, "RATING_PRIOR_MEAN", 3.0))
+
+
+def rating_aggregates(counts):
+    """
+    Derive `number_rating`, `avg_rating` and `weighted_rating` from a
+    {star: count} histogram whose counts may be expressions, so they can be
+    used inside an UPDATE.
+
+    `weighted_rating` is the Bayesian average (IMDb style): the book's
+    ratings plus RATING_PRIOR_VOTES phantom votes at the catalog-wide mean
+    stored in RatingPrior, which the statement reads itself. Unrated books
+    score 0.
+    """
+    total = sum(counts.values())
+    weighted = sum(star * count for star, count in counts.items())
+    votes = getattr(settings, "RATING_PRIOR_VOTES", 10)
+    prior = Coalesce(Subquery(RatingPrior.objects.values("mean")[:1]), Value(default_prior_mean()))
+
+    return {
+        "number_rating": total,
+        "avg_rating": Coalesce(Cast(weighted, FloatField()) / NullIf(total, 0), Value(0.0)),
+        "weighted_rating": Case(
+            When(Exact(total, 0), then=Value(0.0)),
+            default=(Cast(weighted, FloatField()) + votes * prior) / (total + votes),
+            output_field=FloatField(),
+        ),
+    }
+
+
+class BookManager(models.Manager):
+    def update_rating(self, book_id, added=None, removed=None):
+        """
+        Move one review's rating in or out of the book's histogram and
+        re-derive the average and count, all in a single atomic UPDATE.
+        """
+        deltas = Counter()
+        if added is not None:
+            deltas[added] += 1
+        if removed is not None:
+            deltas[removed] -= 1
+
+        return self.apply_rating_deltas(book_id, deltas)
+
+    def apply_rating_deltas(self, book_id, deltas):
+        """Add a {star: delta} change to the book's histogram in one UPDATE."""
+        counts = {star: F(f"rating_{star}") + deltas.get(star, 0) for star in STARS}
+
+        return self.filter(pk=book_id).update(
+            **{f"rating_{star}": counts[star] for star in STARS if deltas.get(star)},
+            **rating_aggregates(counts),
+            updated_at=Now(),
+        )
+
+    def review_star_counts(self):
+        """Per-star Review counts for each book, as correlated subqueries."""
+        return {
+            star: Coalesce(
+                Subquery(
+                    Review.objects.filter(book=OuterRef("pk"), rating=star)
+                    .order_by().values("book").annotate(n=Count("pk")).values("n")
+                ),
+                0,
+            )
+            for star in STARS
+        }
+
+    def recompute_ratings(self, book_ids=None):
+        """Rebuild histograms and aggregates from the Review table, set-based."""
+        books = self.all() if book_ids is None else self.filter(pk__in=book_ids)
+        books.update(**{f"rating_{star}": count for star, count in self.review_star_counts().items()})
+
+        return books.update(**rating_aggregates({star: F(f"rating_{star}") for star in STARS}), updated_at=Now())
+
+    def rating_mismatches(self, book_ids=None):
+        """Books whose stored ratings disagree with their Review rows."""
+        books = self.all() if book_ids is None else self.filter(pk__in=book_ids)
+        counts = self.review_star_counts()
+        expected = rating_aggregates(counts)
+
+        books = books.annotate(
+            **{f"expected_{star}": count for star, count in counts.items()},
+            expected_number=expected["number_rating"],
+            avg_error=Abs(F("avg_rating") - expected["avg_rating"]),
+            weighted_error=Abs(F("weighted_rating") - expected["weighted_rating"]),
+        )
+
+        mismatch = ~Q(number_rating=F("expected_number")) | Q(avg_error__gt=1e-9) | Q(weighted_error__gt=1e-9)
+        for star in STARS:
+            mismatch |= ~Q(**{f"rating_{star}": F(f"expected_{star}")})
+
+        return books.filter(mismatch)
+
+    def refresh_rating_prior(self, tolerance=0.0):
+        """
+        Move the prior to the mean of every rating in the catalog and, if it
+        changed by more than `tolerance`, re-score all books in one UPDATE.
+        Returns the new mean, or None when the stored prior was kept.
+        """
+        totals = self.aggregate(
+            total=Sum("number_rating"),
+            weighted=Sum(sum(star * F(f"rating_{star}") for star in STARS)),
+        )
+        mean = totals["weighted"] / totals["total"] if totals["total"] else default_prior_mean()
+
+        with transaction.atomic():
+            prior = RatingPrior.objects.select_for_update().first()
+            if prior is not None and abs(prior.mean - mean) <= tolerance:
+                return None
+
+            RatingPrior.objects.update_or_create(pk=1, defaults={"mean": mean})
+            weighted_rating = rating_aggregates({star: F(f"rating_{star}") for star in STARS})["weighted_rating"]
+            self.update(weighted_rating=weighted_rating)
+
+        return mean
+
+
 class Book(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -79,10 +225,64 @@ class Book(models.Model):
     author = models.ForeignKey(Author, on_delete=models.CASCADE)
     avg_rating = models.FloatField(default=0)
     number_rating = models.IntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    weighted_rating = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = BookManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["avg_rating", "number_rating"], name="book_rating_idx"),
+            models.Index(fields=["category", "avg_rating", "number_rating"], name="book_category_rating_idx"),
+            models.Index(fields=["author", "avg_rating", "number_rating"], name="book_author_rating_idx"),
+            models.Index(fields=["weighted_rating", "number_rating"], name="book_weighted_rating_idx"),
+            models.Index(fields=["category", "weighted_rating", "number_rating"], name="book_category_weighted_idx"),
+            models.Index(fields=["author", "weighted_rating", "number_rating"], name="book_author_weighted_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f"rating_{star}") for star in STARS}
+
+# RATING PRIOR
+class RatingPrior(models.Model):
+    """
+    The catalog-wide mean rating that `Book.weighted_rating` shrinks towards.
+    A single row, kept current by `manage.py refresh_rating_prior`.
+    """
+    mean = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.mean:.3f}"
+
+# SIMILAR BOOKS
+class SimilarBook(models.Model):
+    """
+    One of a book's nearest neighbours by item-item rating similarity,
+    rebuilt in full by `manage.py build_similar_books`.
+    """
+    # Indexed by similar_book_score_idx.
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="+", db_index=False)
+    similar = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="similar_to")
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["book", "score"], name="similar_book_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} ~ {self.similar_id} ({self.score:.3f})"
+
 # REVIEW
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -90,6 +290,11 @@ class Review(models.Model):
     comment = models.CharField(max_length=255, null=True)
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["book", "user"], name="unique_review_per_book_user"),
+        ]
+
     def __str__(self):
         return str(self.rating) + " | " + str(self.book) + " | " + str(self.user)
 
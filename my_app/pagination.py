@@ -0,0 +1,165 @@
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+# CURSOR PAGINATION
+class AsyncCursorPagination(CursorPagination):
+    """
+    CursorPagination whose page can also be read through the async ORM
+    (`apaginate_queryset`). DRF's paginate_queryset is split around its one
+    query so both paths share the cursor logic.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([item async for item in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The queryset of the requested page plus one row to look ahead."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (self.offset, self.reverse, self.current_position) = (0, False, None)
+        else:
+            (self.offset, self.reverse, self.current_position) = self.cursor
+
+        # Cursor pagination always enforces an ordering.
+        if self.reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # If we have a cursor with a fixed position then seek past it.
+        if self.current_position is not None:
+            try:
+                queryset = queryset.filter(self.position_filter(self.current_position, self.cursor.reverse))
+            except (TypeError, ValueError, ValidationError):
+                # A position value the ordering field can't take.
+                raise NotFound(self.invalid_cursor_message)
+
+        return queryset[self.offset:self.offset + self.page_size + 1]
+
+    def position_filter(self, position, reverse):
+        """
+        Rows strictly after `position` in the ordering (before it when
+        `reverse`), compared on every ordering column: (a, b) > (x, y) is
+        a > x OR (a = x AND b > y). The extra bound on the first column lets
+        the database seek its index to the position.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        terms = []
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            # Test for: (cursor reversed) XOR (queryset reversed)
+            lookup = "lt" if reverse != order.startswith("-") else "gt"
+            order_attr = order.lstrip("-")
+            terms.append(Q(**equal, **{f"{order_attr}__{lookup}": value}))
+            equal[order_attr] = value
+
+        first_lookup = "lte" if reverse != self.ordering[0].startswith("-") else "gte"
+        bound = Q(**{f"{self.ordering[0].lstrip('-')}__{first_lookup}": values[0]})
+        return bound & reduce(operator.or_, terms)
+
+    def _get_position_from_instance(self, instance, ordering):
+        # The whole ordering key, so positions are unique and pages never
+        # need an OFFSET to step over ties.
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            values.append(instance[field_name] if isinstance(instance, dict) else getattr(instance, field_name))
+        return json.dumps(values, default=str)
+
+    def set_page(self, results):
+        """Take the page and the next/previous positions from the fetched rows."""
+        self.page = list(results[:self.page_size])
+
+        # Determine the position of the final item following the page.
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if self.reverse:
+            # The query ran in reverse, so put the items back in order.
+            self.page = list(reversed(self.page))
+
+            self.has_next = (self.current_position is not None) or (self.offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = self.current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (self.current_position is not None) or (self.offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = self.current_position
+
+        # Display page controls in the browsable API if there is more
+        # than one page.
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+# BOOK PAGINATION
+class BookCursorPagination(AsyncCursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "id"
+
+    def get_ordering(self, request, queryset, view):
+        # Search results (`?q=`) are annotated by my_app.search and page by
+        # rank unless the client asked for an explicit `?ordering=`.
+        if "search_rank" in queryset.query.annotations and not request.query_params.get(OrderingFilter.ordering_param):
+            return ("search_rank", "id")
+
+        ordering = super().get_ordering(request, queryset, view)
+
+        # Break ties on the primary key so page boundaries are deterministic.
+        if "id" not in ordering and "-id" not in ordering:
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+
+        return ordering
+
+# REVIEW PAGINATION
+class ReviewCursorPagination(AsyncCursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-id"
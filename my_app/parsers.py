@@ -0,0 +1,31 @@
+import codecs
+
+from django.conf import settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson when it is installed,
+    falling back to the stdlib parser otherwise. Like the strict stdlib
+    parser, it rejects NaN and Infinity.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,116 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .cache import bump_version
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+
+class RatingAggregator:
+    """
+    Write-behind buffer for book rating changes. Deltas are merged per book
+    in memory and applied in batches, so a hot book takes one row lock per
+    flush instead of one per review.
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(Counter)
+        self._events = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, "RATING_FLUSH_BATCH_SIZE", 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, "RATING_FLUSH_INTERVAL", 1.0)
+
+    def add(self, book_id, added=None, removed=None):
+        with self._lock:
+            deltas = self._pending[book_id]
+            if added is not None:
+                deltas[added] += 1
+            if removed is not None:
+                deltas[removed] -= 1
+            self._events += 1
+            full = self._events >= self.batch_size
+
+        self._start_thread()
+        if full:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return {book_id: dict(deltas) for book_id, deltas in self._pending.items()}
+
+    def flush(self):
+        """Apply every pending delta, one UPDATE per book, in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(Counter)
+                self._events = 0
+
+            if not pending:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    for book_id, deltas in pending.items():
+                        if any(deltas.values()):
+                            Book.objects.apply_rating_deltas(book_id, deltas)
+                    bump_version("book")
+            except Exception:
+                # Put the deltas back so the next flush retries them.
+                with self._lock:
+                    for book_id, deltas in pending.items():
+                        self._pending[book_id].update(deltas)
+                raise
+
+            return len(pending)
+
+    def _start_thread(self):
+        if self._thread is not None or not self.flush_interval:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rating-aggregator", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Rating flush failed; deltas kept for the next flush")
+            finally:
+                connections.close_all()
+
+
+rating_aggregator = RatingAggregator()
+atexit.register(rating_aggregator.flush)
+
+
+def record_rating_change(book_id, added=None, removed=None):
+    """
+    Apply a review's rating change to its book, either right away or, with
+    RATING_WRITE_BEHIND on, through the aggregator once the review commits.
+
+    Returns the number of books updated, or None when the change is deferred.
+    """
+    if not getattr(settings, "RATING_WRITE_BEHIND", False):
+        return Book.objects.update_rating(book_id, added=added, removed=removed)
+
+    transaction.on_commit(lambda: rating_aggregator.add(book_id, added=added, removed=removed))
+    return None
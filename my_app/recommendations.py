@@ -0,0 +1,161 @@
+from itertools import chain
+
+from django.db import connection, transaction
+from django.db.models import Avg, F, Sum, Value
+from django.db.models.functions import Abs
+
+from .cache import bump_version, catalog_cache, get_versions
+from .models import Review, SimilarBook
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+FETCH_SIZE = 100_000
+INSERT_SQL = "INSERT INTO {table} (book_id, similar_id, score) VALUES (%s, %s, %s)"
+# Recommendations kept per user, and the similarity weight that damps
+# predictions resting on few neighbours.
+CANDIDATES = 100
+SHRINK = 1.0
+# Dense cells per block of the book x book product (two float32 blocks of
+# this size are alive at once).
+BLOCK_CELLS = 16_000_000
+
+
+def load_reviews():
+    """Every review as an (n, 3) array of user id, book id and rating."""
+    rows = (
+        Review.objects.order_by()
+        .values_list("user_id", "book_id", "rating")
+        .iterator(chunk_size=FETCH_SIZE)
+    )
+    return np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 3)
+
+
+def rating_matrices(reviews):
+    """
+    Users x books sparse matrices of the reviews: ratings centred on each
+    user's mean (for adjusted cosine), and who rated what (for co-rater
+    counts). Also returns the book id of each column.
+    """
+    user_ids, users = np.unique(reviews[:, 0], return_inverse=True)
+    book_ids, books = np.unique(reviews[:, 1], return_inverse=True)
+    ratings = reviews[:, 2].astype(np.float32)
+
+    means = np.bincount(users, weights=ratings) / np.bincount(users)
+    centred = sparse.csr_matrix(
+        (ratings - means[users].astype(np.float32), (users, books)),
+        shape=(len(user_ids), len(book_ids)),
+    )
+    centred.eliminate_zeros()
+
+    rated = sparse.csr_matrix(
+        (np.ones(len(reviews), dtype=np.float32), (users, books)),
+        shape=(len(user_ids), len(book_ids)),
+    )
+    return centred, rated, book_ids
+
+
+def top_neighbours(centred, rated, k, min_common=2, block_size=None):
+    """
+    Yield (books, neighbours, scores) column indices of each book's k most
+    similar books by adjusted cosine, one block of books at a time. Pairs
+    rated by fewer than `min_common` users or with a similarity <= 0 are
+    left out.
+    """
+    n_books = centred.shape[1]
+    k = min(k, n_books - 1)
+    if k < 1:
+        return
+
+    norms = np.sqrt(np.asarray(centred.multiply(centred).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    normalized = (centred @ sparse.diags(1 / norms)).tocsc()
+    normalized_t = normalized.T.tocsr()
+    rated_t = rated.T.tocsr()
+
+    block_size = block_size or max(1, BLOCK_CELLS // n_books)
+    for start in range(0, n_books, block_size):
+        stop = min(start + block_size, n_books)
+        rows = np.arange(stop - start)
+
+        scores = (normalized_t[start:stop] @ normalized).toarray()
+        scores[(rated_t[start:stop] @ rated).toarray() < min_common] = 0
+        scores[rows, rows + start] = 0
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        keep = top_scores > 0
+
+        books = np.broadcast_to((rows + start)[:, None], top.shape)
+        yield books[keep], top[keep], top_scores[keep]
+
+
+def rebuild_similar_books(k=50, min_common=2, block_size=None):
+    """
+    Replace the SimilarBook table with each book's top-k neighbours from the
+    current reviews, in one transaction. Returns the number of rows stored.
+    """
+    centred, rated, book_ids = rating_matrices(load_reviews())
+
+    stored = 0
+    sql = INSERT_SQL.format(table=connection.ops.quote_name(SimilarBook._meta.db_table))
+    with transaction.atomic(), connection.cursor() as cursor:
+        SimilarBook.objects.all().delete()
+        for books, neighbours, scores in top_neighbours(centred, rated, k, min_common, block_size):
+            # Straight to the cursor: building model instances would cost more than the math.
+            cursor.executemany(sql, zip(book_ids[books].tolist(), book_ids[neighbours].tolist(), scores.tolist()))
+            stored += len(books)
+        bump_version("similar")
+
+    return stored
+
+
+def user_version(user_id):
+    """Catalog cache version name of one user's reviews."""
+    return f"user:{user_id}:reviews"
+
+
+def recommend_books(user_id, limit=CANDIDATES):
+    """
+    [(book id, predicted rating)] of the books the user hasn't reviewed,
+    best first. Each neighbour of a book they rated votes with its
+    similarity times how far that rating is from the user's mean, in one
+    aggregate query over the SimilarBook table.
+    """
+    mean = Review.objects.filter(user_id=user_id).aggregate(mean=Avg("rating"))["mean"]
+    if mean is None:
+        return []
+
+    candidates = (
+        SimilarBook.objects.filter(book__review__user_id=user_id)
+        .exclude(similar__review__user_id=user_id)
+        .values("similar")
+        .annotate(
+            weight=Sum(Abs("score")),
+            evidence=Sum(F("score") * (F("book__review__rating") - Value(mean))),
+        )
+        .annotate(predicted=Value(mean) + F("evidence") / (F("weight") + Value(SHRINK)))
+        .order_by("-predicted", "-weight", "similar")
+        .values_list("similar", "predicted")[:limit]
+    )
+    return list(candidates)
+
+
+def cached_recommendations(user_id):
+    """
+    recommend_books() for the user, cached until they write a review or the
+    similar books table is rebuilt.
+    """
+    versions = get_versions([user_version(user_id), "similar"])
+    key = f"catalog:recommendations:{user_id}:{':'.join(versions)}"
+
+    cache = catalog_cache()
+    ranked = cache.get(key)
+    if ranked is None:
+        ranked = recommend_books(user_id)
+        cache.set(key, ranked, timeout=None)
+
+    return ranked
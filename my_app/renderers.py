@@ -0,0 +1,54 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed, falling back
+    to the stdlib encoder otherwise. The output matches JSONRenderer's:
+    compact, unescaped unicode, and values orjson doesn't handle natively
+    (datetimes, decimals, lazy strings) go through DRF's encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent not in (None, 2):
+            # orjson only knows how to indent by two spaces.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=option)
+
+        # Like JSONRenderer, escape the separators that aren't valid in JavaScript strings.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON: one object per line."""
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(json.dumps(row, cls=DjangoJSONEncoder).encode() + b"\n" for row in rows)
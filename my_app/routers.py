@@ -0,0 +1,107 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+# Set while a ReplicaReadMixin view serves a safe request.
+replica_reads_allowed = ContextVar("replica_reads_allowed", default=False)
+# Set for a client that wrote recently, and once the request itself writes.
+primary_pinned = ContextVar("primary_pinned", default=False)
+
+
+def replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    token = replica_reads_allowed.set(allowed)
+    try:
+        yield
+    finally:
+        replica_reads_allowed.reset(token)
+
+
+@contextmanager
+def pinned_to_primary(pinned=True):
+    token = primary_pinned.set(pinned)
+    try:
+        yield
+    finally:
+        primary_pinned.reset(token)
+
+
+def reads_from_replicas():
+    """Whether reads in this context go to a replica (see ReplicaRouter)."""
+    return (
+        bool(replica_aliases())
+        and replica_reads_allowed.get()
+        and not primary_pinned.get()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+# READ YOUR WRITES
+def pin_cache():
+    return caches[getattr(settings, "READ_YOUR_WRITES_CACHE", "default")]
+
+
+def pin_key(request):
+    """The client: its token, else its session, else its address."""
+    ident = (
+        request.headers.get("Authorization")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get("REMOTE_ADDR", "")
+    )
+    return f"db:pinned:{hashlib.sha1(ident.encode()).hexdigest()}"
+
+
+def is_pinned(request):
+    return request.method not in SAFE_METHODS or bool(pin_cache().get(pin_key(request)))
+
+
+def pin(request):
+    """Keep the client's reads on the primary for READ_YOUR_WRITES_SECONDS."""
+    pin_cache().set(pin_key(request), True, timeout=getattr(settings, "READ_YOUR_WRITES_SECONDS", 5))
+
+
+class ReplicaRouter:
+    """
+    Send catalog reads made inside `replica_reads()` (the views using
+    ReplicaReadMixin) to a random alias of DATABASE_REPLICAS, and everything
+    else to the primary. Reads stay on the primary inside a transaction,
+    once the request has written, and for READ_YOUR_WRITES_SECONDS after
+    the client's last write (see my_app.middleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        # Users, tokens and sessions are always read fresh.
+        if model._meta.app_label != "my_app" or model._meta.label == settings.AUTH_USER_MODEL:
+            return None
+        if reads_from_replicas():
+            return random.choice(replica_aliases())
+        return None
+
+    def db_for_write(self, model, **hints):
+        primary_pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve the view's GET, HEAD and OPTIONS requests from the replicas."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
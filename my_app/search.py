@@ -0,0 +1,80 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from .cache import bump_version
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+INDEX_SQL = """
+    INSERT INTO my_app_book_fts (rowid, name, description, author_name)
+    SELECT b.id, b.name, b.description, a.name
+    FROM my_app_book b JOIN my_app_author a ON a.id = b.author_id
+"""
+
+
+def to_fts_query(text):
+    """
+    Turn free text from `?q=` into a safe FTS5 query: every word becomes a
+    quoted prefix term, so user input can never inject FTS5 syntax.
+    """
+    return " ".join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def index_books(book_ids=(), author_ids=()):
+    """
+    (Re)index the given books, and every book of the given authors, in the
+    FTS5 table. Writes that bypass model signals, such as bulk_create or
+    queryset.update(), must call this themselves.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        for column, ids in (("id", list(book_ids)), ("author_id", list(author_ids))):
+            if not ids:
+                continue
+
+            books = f"SELECT id FROM my_app_book WHERE {column} IN ({', '.join(['%s'] * len(ids))})"
+            cursor.execute(f"DELETE FROM my_app_book_fts WHERE rowid IN ({books})", ids)
+            cursor.execute(f"{INDEX_SQL} WHERE b.id IN ({books})", ids)
+
+    bump_version("book")
+
+
+def unindex_books(book_ids):
+    ids = list(book_ids)
+    if connection.vendor != "sqlite" or not ids:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM my_app_book_fts WHERE rowid IN ({', '.join(['%s'] * len(ids))})", ids)
+
+    bump_version("book")
+
+
+def search_books(queryset, text):
+    """
+    Filter a Book queryset down to matches for `text` on the book name,
+    description and author name, annotated with `search_rank` (lower is better).
+    """
+    if connection.vendor != "sqlite":
+        # No FTS5 index outside SQLite: fall back to a scan, ranked by id.
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text) | Q(author__name__icontains=text)
+        ).annotate(search_rank=F("id"))
+
+    fts_query = to_fts_query(text)
+    if not fts_query:
+        return queryset.none().annotate(search_rank=F("id"))
+
+    return queryset.filter(
+        id__in=RawSQL("SELECT rowid FROM my_app_book_fts WHERE my_app_book_fts MATCH %s", (fts_query,))
+    ).annotate(
+        search_rank=RawSQL(
+            "SELECT rank FROM my_app_book_fts WHERE my_app_book_fts MATCH %s AND rowid = my_app_book.id",
+            (fts_query,),
+        )
+    )
@@ -1,9 +1,101 @@
 from rest_framework import serializers
-from .models import Author, Book, Review, Category
+from rest_framework.permissions import SAFE_METHODS
+from .models import Author, Book, Review, Category, STARS
+
+
+# SPARSE FIELDSETS
+class SparseFieldsMixin:
+    """
+    Trim the serializer to the comma separated `?fields=` of a GET request.
+    `Meta.sparse_columns` maps fields that aren't backed by a single model
+    column to the columns they read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        requested = self.requested_fields()
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    def requested_fields(self):
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+
+        fields = request.query_params.get("fields")
+        if not fields:
+            return None
+
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}"})
+
+        return requested
+
+    def get_sparse_columns(self):
+        """
+        Model columns (in `QuerySet.only()` form) the trimmed fields read, or
+        None when the serializer isn't trimmed.
+        """
+        if self.requested_fields() is None:
+            return None
+
+        return self.get_columns()
+
+    def get_columns(self):
+        extra = getattr(self.Meta, "sparse_columns", {})
+        columns = {self.Meta.model._meta.pk.name}
+        for name, field in self.fields.items():
+            if name in extra:
+                columns.update(extra[name])
+            elif isinstance(field, SparseFieldsMixin):
+                columns.update(f"{field.source}__{column}" for column in field.get_columns())
+            else:
+                columns.add(field.source.replace(".", "__"))
+
+        return columns
+
+    def get_select_related(self):
+        """Relations to join for the fields that read across a foreign key."""
+        return {column.rsplit("__", 1)[0] for column in self.get_columns() if "__" in column}
+
+
+# EXPANDABLE FIELDS
+class ExpandableFieldsMixin:
+    """
+    Replace the foreign keys listed in the comma separated `?expand=` of a GET
+    request with the nested serializers in `Meta.expandable`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for name in self.requested_expansions():
+            if name in self.fields:
+                self.fields[name] = self.Meta.expandable[name](read_only=True)
+
+    def requested_expansions(self):
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return set()
+
+        expand = request.query_params.get("expand")
+        if not expand:
+            return set()
+
+        requested = {name.strip() for name in expand.split(",") if name.strip()}
+        unknown = requested - set(getattr(self.Meta, "expandable", {}))
+        if unknown:
+            raise serializers.ValidationError({"expand": f"Cannot expand: {', '.join(sorted(unknown))}"})
+
+        return requested
 
 
 # AUTHOR SERIALIZER
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source="user.username")
 
     class Meta:
@@ -12,27 +104,59 @@ class AuthorSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 # CATEGORY SERIALIZER
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "description"]
         read_only_fields = ["id"]
 
 # BOOK SERIALIZER
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(ExpandableFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source="user.username")
+    rating_histogram = serializers.ReadOnlyField()
     #author = serializers.CharField(source="author.name")
     class Meta:
         model = Book
-        fields = ["id", "user", "name", "description", "category", "author", "avg_rating", "number_rating"]
-        read_only_fields = ["id"]
+        fields = ["id", "user", "name", "description", "category", "author", "avg_rating", "number_rating", "weighted_rating", "rating_histogram"]
+        read_only_fields = ["id", "avg_rating", "number_rating", "weighted_rating"]
+        sparse_columns = {"rating_histogram": [f"rating_{star}" for star in STARS]}
+        expandable = {"author": AuthorSerializer, "category": CategorySerializer}
+
+# SIMILAR BOOK SERIALIZER
+class SimilarBookSerializer(BookSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ["similarity"]
+        sparse_columns = {**BookSerializer.Meta.sparse_columns, "similarity": []}
+
+# RECOMMENDED BOOK SERIALIZER
+class RecommendedBookSerializer(BookSerializer):
+    score = serializers.FloatField(read_only=True, source="recommendation_score")
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ["score"]
+        sparse_columns = {**BookSerializer.Meta.sparse_columns, "score": []}
+
+# BULK BOOK SERIALIZER
+class BookBulkSerializer(serializers.Serializer):
+    """
+    One item of a bulk book write. Foreign keys are plain ids here; the bulk
+    endpoint checks them for a whole batch at once (see my_app.bulk).
+    """
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(max_length=255)
+    author = serializers.IntegerField()
+    category = serializers.IntegerField(required=False, allow_null=True)
 
 
 # REVIEW SERIALIZER
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(ExpandableFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source="user.username")
 
     class Meta:
         model = Review
         fields = ["id", "user", "rating", "comment", "book"]
         read_only_fields = ["id", "book"]
+        expandable = {"book": BookSerializer}
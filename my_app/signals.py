@@ -0,0 +1,114 @@
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Author, Book, Category, Review, User
+from .ratings import record_rating_change
+from .recommendations import user_version
+from .search import index_books, unindex_books
+
+
+# Keep the my_app_book_fts search index in step with book and author writes.
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, **kwargs):
+    index_books(book_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, **kwargs):
+    unindex_books([instance.pk])
+
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, created, **kwargs):
+    if not created:
+        index_books(author_ids=[instance.pk])
+
+
+# Keep Book.rating_* histograms (and the derived avg_rating / number_rating)
+# in step with every review write, including admin edits and cascades from
+# deleted users. Reviews deleted along with their book are left alone.
+def deleted_with_book(origin):
+    """Whether a delete started from a Book (or Book queryset) and cascaded."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, Book)
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_delete, sender=Review)
+def load_counted_rating(sender, instance, using, origin=None, **kwargs):
+    # The book's own row is going too: nothing to read or move.
+    if deleted_with_book(origin):
+        return
+
+    # The histogram counts what the stored row says, not what this instance
+    # was loaded with: read it again, locked when inside a transaction, so
+    # concurrent edits or deletes of one review each move only the rating
+    # they really changed (and a second delete moves nothing).
+    if instance.pk is not None:
+        reviews = Review.objects.using(using).filter(pk=instance.pk)
+        if connections[using].in_atomic_block:
+            reviews = reviews.select_for_update()
+        instance._counted = reviews.values_list("book_id", "rating").first() or (None, None)
+
+
+@receiver(post_save, sender=Review)
+def count_review_rating(sender, instance, created, **kwargs):
+    counted_book, counted_rating = (None, None) if created else getattr(instance, "_counted", (None, None))
+    current = (instance.book_id, instance.rating)
+
+    if current == (counted_book, counted_rating):
+        return
+
+    if counted_book == instance.book_id:
+        updated = record_rating_change(instance.book_id, added=instance.rating, removed=counted_rating)
+    else:
+        if counted_book is not None:
+            record_rating_change(counted_book, removed=counted_rating)
+        updated = record_rating_change(instance.book_id, added=instance.rating)
+
+    # The UPDATE doubles as the existence check for the reviewed book. With
+    # write-behind on, the review's foreign key constraint does that instead.
+    if updated == 0:
+        raise Book.DoesNotExist(f"Book {instance.book_id} does not exist.")
+
+    instance._counted = current
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review_rating(sender, instance, origin, **kwargs):
+    if deleted_with_book(origin):
+        return
+
+    book_id, rating = instance._counted
+    if book_id is not None:
+        record_rating_change(book_id, removed=rating)
+
+
+# Invalidate cached catalog responses (my_app.cache) on every model write.
+def bump_catalog_version(sender, **kwargs):
+    bump_version(sender._meta.model_name)
+
+
+for model in (Author, Book, Category, Review):
+    post_save.connect(bump_catalog_version, sender=model, dispatch_uid=f"catalog_version_{model.__name__}_save")
+    post_delete.connect(bump_catalog_version, sender=model, dispatch_uid=f"catalog_version_{model.__name__}_delete")
+
+
+# Books and authors show their user's username. A new user isn't shown anywhere yet.
+@receiver(post_save, sender=User)
+def bump_user_version(sender, instance, created, **kwargs):
+    if not created:
+        bump_version("user")
+
+
+post_delete.connect(bump_catalog_version, sender=User, dispatch_uid="catalog_version_User_delete")
+
+
+# Recompute a user's cached recommendations (my_app.recommendations) after they review.
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_user_reviews_version(sender, instance, **kwargs):
+    bump_version(user_version(instance.user_id))
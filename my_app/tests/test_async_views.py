@@ -0,0 +1,131 @@
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..async_views import AsyncReadView
+from ..cache import catalog_cache
+from ..models import Author, Book, Category, Review
+
+
+class AsyncReadViewTests(TestCase):
+    """Requests through the AsyncClient are served by the ASGI urlconf."""
+
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="test@user.com", password="passtestuser"
+        )
+        self.author = Author.objects.create(user=self.user, name="Example Author")
+        self.category = Category.objects.create(name="Test Category")
+        self.books = [
+            Book.objects.create(user=self.user, name=f"Book {i}", category=self.category, author=self.author)
+            for i in range(3)
+        ]
+        self.review = Review.objects.create(user=self.user, book=self.books[0], rating=4, comment="Good")
+
+    def read_urls(self):
+        return [
+            reverse("myapp:book-list") + "?page_size=2",
+            reverse("myapp:book-list") + "?fields=id,name&ordering=-name",
+            reverse("myapp:book-detail", args=[self.books[0].id]),
+            reverse("myapp:author-list"),
+            reverse("myapp:author-detail", args=[self.author.id]),
+            reverse("myapp:category-list"),
+            reverse("myapp:category-detail", args=[self.category.id]),
+            reverse("myapp:book-reviews", args=[self.books[0].id]) + "?expand=book",
+            reverse("myapp:user-reviews", args=[self.user.id]),
+        ]
+
+    async def test_reads_match_wsgi(self):
+        for url in self.read_urls():
+            with self.subTest(url=url):
+                res = await self.async_client.get(url)
+                catalog_cache().clear()
+                expected = await sync_to_async(self.client.get)(url)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertIs(res.resolver_match.func.view_class, AsyncReadView)
+                self.assertEqual(res.json(), expected.json())
+
+    def test_wsgi_keeps_sync_views(self):
+        res = self.client.get(reverse("myapp:book-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNot(getattr(res.resolver_match.func, "view_class", None), AsyncReadView)
+
+    async def test_follow_cursor(self):
+        res = await self.async_client.get(reverse("myapp:book-list"), {"page_size": 2})
+        res = await self.async_client.get(res.json()["next"])
+
+        self.assertEqual([book["id"] for book in res.json()["results"]], [self.books[2].id])
+        self.assertIsNotNone(res.json()["previous"])
+
+    async def test_not_found(self):
+        res = await self.async_client.get(reverse("myapp:book-detail", args=[self.books[-1].id + 1]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_reads_authenticate(self):
+        url = reverse("myapp:book-list")
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await self.async_client.get(url, headers={"Authorization": "Token bad"})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.async_client.get(url, headers={"Authorization": f"Token {token.key}"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    async def test_bad_parameter(self):
+        res = await self.async_client.get(reverse("myapp:book-list"), {"min_rating": "high"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min_rating", res.json())
+
+    async def test_cached_and_conditional(self):
+        url = reverse("myapp:book-detail", args=[self.books[0].id])
+        first = await self.async_client.get(url)
+
+        await Book.objects.filter(pk=self.books[0].pk).aupdate(name="Changed Behind The Cache")
+        second = await self.async_client.get(url)
+        not_modified = await self.async_client.get(url, headers={"If-None-Match": first["ETag"]})
+
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_writes_use_drf_view(self):
+        token = await Token.objects.acreate(user=self.user)
+        url = reverse("myapp:book-reviews", args=[self.books[1].id])
+
+        res = await self.async_client.post(url, {"rating": 5}, content_type="application/json")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.async_client.post(
+            url, {"rating": 5, "comment": "Great"}, content_type="application/json",
+            headers={"Authorization": f"Token {token.key}"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Review.objects.filter(book=self.books[1], user=self.user).aexists())
+
+    async def test_export_streams_async(self):
+        res = await self.async_client.get(reverse("myapp:book-export"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        lines = b"".join([chunk async for chunk in res.streaming_content]).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [book.id for book in self.books])
+
+    async def test_browsable_api_uses_drf_view(self):
+        res = await self.async_client.get(reverse("myapp:book-list"), headers={"Accept": "text/html"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/html"))
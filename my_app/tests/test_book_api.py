@@ -1,11 +1,21 @@
+import json
+from base64 import b64encode
+from datetime import timedelta
+from urllib.parse import urlencode
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
-from ..models import Book, Author, Category
+from ..models import Book, Author, Category, Review
+from ..search import index_books
+from ..cache import catalog_cache
 
 
 def create_user():
@@ -48,6 +58,22 @@ class BookApiPublicTests(TestCase):
         res = self.client.get(reverse("myapp:book-list"))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_list_books_paginated(self):
+        user = create_user()
+        books = [create_book(user=user, name=f"Book {i}") for i in range(3)]
+
+        res = self.client.get(reverse("myapp:book-list"), {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertEqual([b["id"] for b in res.data["results"]], [books[0].id, books[1].id])
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual([b["id"] for b in res.data["results"]], [books[2].id])
+        self.assertIsNone(res.data["next"])
+        self.assertIsNotNone(res.data["previous"])
+
     def test_create_book_fails(self):
         user = create_user()
         author = Author.objects.create(
@@ -176,3 +202,514 @@ class BookApiAdminTests(APITestCase):
         res = self.client.delete(reverse("myapp:book-detail", args=[book.id]))
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Book.objects.filter(id=book.id).exists())
+
+
+# Search Tests
+class BookSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.author = Author.objects.create(user=self.user, name="Ursula Le Guin")
+
+    def search(self, q):
+        res = self.client.get(reverse("myapp:book-list"), {"q": q})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [b["id"] for b in res.data["results"]]
+
+    def test_search_name_description_and_author(self):
+        dune = create_book(user=self.user, name="Dune", description="Desert planet")
+        earthsea = create_book(user=self.user, name="Earthsea", description="Wizards", author=self.author)
+
+        self.assertEqual(self.search("dune"), [dune.id])
+        self.assertEqual(self.search("desert"), [dune.id])
+        self.assertEqual(self.search("guin"), [earthsea.id])
+        self.assertEqual(self.search("wiz"), [earthsea.id])
+        self.assertEqual(self.search("nothing"), [])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_search_ranks_results(self):
+        weak = create_book(user=self.user, name="Atlas", description="A dragon appears once in a long, long tale")
+        strong = create_book(user=self.user, name="Dragon", description="Dragon dragon")
+
+        self.assertEqual(self.search("dragon"), [strong.id, weak.id])
+
+        res = self.client.get(reverse("myapp:book-list"), {"q": "dragon", "page_size": 1})
+        self.assertEqual([b["id"] for b in res.data["results"]], [strong.id])
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual([b["id"] for b in res.data["results"]], [weak.id])
+
+    def test_search_index_follows_writes(self):
+        book = create_book(user=self.user, name="Old Title", author=self.author)
+
+        book.name = "New Title"
+        book.save()
+        self.assertEqual(self.search("old"), [])
+        self.assertEqual(self.search("new"), [book.id])
+
+        self.author.name = "Renamed Author"
+        self.author.save()
+        self.assertEqual(self.search("guin"), [])
+        self.assertEqual(self.search("renamed"), [book.id])
+
+        book.delete()
+        self.assertEqual(self.search("new"), [])
+
+    def test_index_books_after_bulk_create(self):
+        books = Book.objects.bulk_create(
+            Book(user=self.user, name=f"Bulk {i}", description="", author=self.author) for i in range(3)
+        )
+        self.assertEqual(self.search("bulk"), [])
+
+        index_books(book_ids=[b.id for b in books])
+
+        self.assertEqual(sorted(self.search("bulk")), [b.id for b in books])
+
+
+# Ordering & Filter Tests
+class BookOrderingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+
+    def list_ids(self, **params):
+        res = self.client.get(reverse("myapp:book-list"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [b["id"] for b in res.data["results"]]
+
+    def test_order_by_rating(self):
+        low = create_book(user=self.user, avg_rating=2.5, number_rating=10)
+        tied_few = create_book(user=self.user, avg_rating=4.5, number_rating=3)
+        tied_many = create_book(user=self.user, avg_rating=4.5, number_rating=300)
+
+        self.assertEqual(
+            self.list_ids(ordering="-avg_rating,-number_rating"),
+            [tied_many.id, tied_few.id, low.id],
+        )
+        self.assertEqual(self.list_ids(ordering="avg_rating,number_rating"), [low.id, tied_few.id, tied_many.id])
+
+    def test_ordering_paginates_across_ties(self):
+        books = [create_book(user=self.user, avg_rating=4.0, number_rating=1) for _ in range(5)]
+
+        res = self.client.get(reverse("myapp:book-list"), {"ordering": "-avg_rating", "page_size": 2})
+        seen = [b["id"] for b in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            seen += [b["id"] for b in res.data["results"]]
+
+        self.assertEqual(seen, sorted((b.id for b in books), reverse=True))
+
+    def test_ordering_pages_seek_without_offset(self):
+        books = [create_book(user=self.user, avg_rating=rating, number_rating=1) for rating in (4.0, 4.0, 4.0, 3.5, 3.5)]
+        expected = [b.id for b in sorted(books, key=lambda b: (-b.avg_rating, -b.id))]
+
+        res = self.client.get(reverse("myapp:book-list"), {"ordering": "-avg_rating", "page_size": 2})
+        pages = [[b["id"] for b in res.data["results"]]]
+        with CaptureQueriesContext(connection) as queries:
+            while res.data["next"]:
+                res = self.client.get(res.data["next"])
+                pages.append([b["id"] for b in res.data["results"]])
+
+        self.assertEqual(sum(pages, []), expected)
+        page_sql = [q["sql"] for q in queries if 'FROM "my_app_book"' in q["sql"]]
+        self.assertTrue(page_sql)
+        for sql in page_sql:
+            self.assertNotIn("OFFSET", sql)
+
+        res = self.client.get(res.data["previous"])
+        self.assertEqual([b["id"] for b in res.data["results"]], pages[-2])
+
+    def test_malformed_cursor_position(self):
+        create_book(user=self.user)
+
+        for position, ordering in [('["x"]', "id"), ('[{"a": 1}, 2]', "-avg_rating"), ("[1, 2, 3]", "id"), ("x", "id")]:
+            with self.subTest(position=position):
+                cursor = b64encode(urlencode({"p": position}).encode()).decode()
+                res = self.client.get(reverse("myapp:book-list"), {"ordering": ordering, "cursor": cursor})
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_min_rating_and_reviews(self):
+        create_book(user=self.user, avg_rating=3.0, number_rating=100)
+        few = create_book(user=self.user, avg_rating=4.8, number_rating=2)
+        many = create_book(user=self.user, avg_rating=4.2, number_rating=50)
+
+        self.assertEqual(self.list_ids(min_rating=4), [few.id, many.id])
+        self.assertEqual(self.list_ids(min_rating=4, min_reviews=10), [many.id])
+
+    def test_filter_invalid_number(self):
+        res = self.client.get(reverse("myapp:book-list"), {"min_rating": "high"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min_rating", res.data)
+
+    def test_best_in_category_uses_index(self):
+        book = create_book(user=self.user)
+        queryset = Book.objects.filter(category=book.category).order_by("-avg_rating", "-number_rating", "-id")
+
+        plan = queryset.explain()
+
+        self.assertIn("book_category_rating_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_best_by_author_uses_index(self):
+        book = create_book(user=self.user)
+        queryset = Book.objects.filter(author=book.author).order_by("-avg_rating", "-number_rating", "-id")
+
+        plan = queryset.explain()
+
+        self.assertIn("book_author_rating_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_weighted_best_in_category_uses_index(self):
+        book = create_book(user=self.user)
+        queryset = Book.objects.filter(category=book.category).order_by("-weighted_rating", "-number_rating", "-id")
+
+        plan = queryset.explain()
+
+        self.assertIn("book_category_weighted_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+# Leaderboard Tests
+class BookLeaderboardTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.user = create_user()
+
+    def top_ids(self, **params):
+        res = self.client.get(reverse("myapp:book-top"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [b["id"] for b in res.data]
+
+    def test_top_books(self):
+        unrated = create_book(user=self.user)
+        low = create_book(user=self.user)
+        single = create_book(user=self.user)
+        many = create_book(user=self.user)
+        Book.objects.apply_rating_deltas(low.id, {2: 10})
+        Book.objects.apply_rating_deltas(single.id, {5: 1})
+        Book.objects.apply_rating_deltas(many.id, {5: 240, 4: 60})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.top_ids(), [many.id, single.id, low.id, unrated.id])
+        self.assertEqual(self.top_ids(limit=2), [many.id, single.id])
+        self.assertEqual(self.top_ids(min_reviews=5), [many.id, low.id])
+
+    def test_top_in_category_and_by_author(self):
+        book = create_book(user=self.user, weighted_rating=3.0, number_rating=1)
+        better = create_book(user=self.user, weighted_rating=4.0, number_rating=1, category=book.category)
+        create_book(user=self.user, weighted_rating=5.0, number_rating=1, author=book.author)
+
+        self.assertEqual(self.top_ids(category=book.category.id), [better.id, book.id])
+        self.assertEqual(self.top_ids(author=better.author.id), [better.id])
+
+    def test_reviews_update_leaderboard(self):
+        first = create_book(user=self.user)
+        second = create_book(user=self.user)
+        Review.objects.create(user=self.user, rating=3, book=first)
+        self.assertEqual(self.top_ids(), [first.id, second.id])
+
+        Review.objects.create(user=self.user, rating=5, book=second)
+
+        self.assertEqual(self.top_ids(), [second.id, first.id])
+
+    def test_invalid_limit(self):
+        for limit in ["many", 0, 101]:
+            with self.subTest(limit=limit):
+                res = self.client.get(reverse("myapp:book-top"), {"limit": limit})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("limit", res.data)
+
+
+# Sparse Fieldset Tests
+class BookSparseFieldsTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.book = create_book(user=self.user, avg_rating=4.5)
+
+    def test_list_selected_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse("myapp:book-list"), {"fields": "id,name,avg_rating"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [{"id": self.book.id, "name": "Test Book", "avg_rating": 4.5}])
+
+        self.assertEqual(len(queries), 1)
+        sql = queries.captured_queries[0]["sql"]
+        self.assertNotIn("description", sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_detail_selected_fields(self):
+        res = self.client.get(
+            reverse("myapp:book-detail", args=[self.book.id]), {"fields": "user,rating_histogram"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"user": self.user.username, "rating_histogram": self.book.rating_histogram})
+
+    def test_ordering_field_not_requested(self):
+        other = create_book(user=self.user, avg_rating=2.0)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                reverse("myapp:book-list"), {"fields": "name", "ordering": "avg_rating", "page_size": 1}
+            )
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(res.data["results"], [{"name": other.name}])
+        self.assertIsNotNone(res.data["next"])
+
+    def test_unknown_field(self):
+        res = self.client.get(reverse("myapp:book-list"), {"fields": "id,price"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
+
+    def test_fields_ignored_on_write(self):
+        superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.client.force_authenticate(superuser)
+
+        res = self.client.patch(
+            reverse("myapp:book-detail", args=[self.book.id]) + "?fields=id",
+            {"description": "Updated description"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["description"], "Updated description")
+
+
+# Expansion Tests
+class BookExpandTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.user = create_user()
+
+    def test_expand_author_and_category(self):
+        books = [create_book(user=self.user, name=f"Book {i}") for i in range(3)]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("myapp:book-list"), {"expand": "author,category"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first = res.data["results"][0]
+        self.assertEqual(
+            first["author"],
+            {"id": books[0].author.id, "user": self.user.username, "name": "Example Author", "date_of_birth": None, "country": ""},
+        )
+        self.assertEqual(
+            first["category"],
+            {"id": books[0].category.id, "name": "Test Category", "description": "Test Category Description"},
+        )
+
+    def test_expand_with_sparse_fields(self):
+        book = create_book(user=self.user)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                reverse("myapp:book-detail", args=[book.id]), {"fields": "name,author", "expand": "author"}
+            )
+
+        self.assertEqual(res.data["name"], book.name)
+        self.assertEqual(res.data["author"]["name"], book.author.name)
+
+    def test_expand_unknown_relation(self):
+        res = self.client.get(reverse("myapp:book-list"), {"expand": "user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", res.data)
+
+    def test_write_ignores_expand(self):
+        superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.client.force_authenticate(superuser)
+        book = create_book(user=self.user)
+
+        res = self.client.patch(
+            reverse("myapp:book-detail", args=[book.id]) + "?expand=author",
+            {"author": book.author.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["author"], book.author.id)
+
+
+# Bulk Tests
+class BookBulkApiTests(APITestCase):
+    def setUp(self):
+        self.superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.superuser)
+
+        self.author = Author.objects.create(user=self.superuser, name="Example Author")
+        self.category = Category.objects.create(name="Test Category")
+        self.url = reverse("myapp:book-bulk")
+
+    def test_bulk_create_reports_item_errors(self):
+        items = [
+            {"name": "Bulk One", "description": "First", "author": self.author.id, "category": self.category.id},
+            {"name": "Bulk Two", "description": "Second", "author": self.author.id},
+            {"description": "No name", "author": self.author.id},
+            {"name": "Bad Author", "description": "Missing", "author": self.author.id + 100},
+            {"name": "Bad Category", "description": "Missing", "author": self.author.id, "category": 999},
+        ]
+
+        res = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["created"]), 2)
+        self.assertEqual([e["index"] for e in res.data["errors"]], [2, 3, 4])
+        self.assertIn("name", res.data["errors"][0]["errors"])
+        self.assertIn("author", res.data["errors"][1]["errors"])
+        self.assertIn("category", res.data["errors"][2]["errors"])
+
+        books = Book.objects.filter(id__in=res.data["created"]).order_by("id")
+        self.assertEqual([b.name for b in books], ["Bulk One", "Bulk Two"])
+        self.assertEqual(books[0].user, self.superuser)
+        self.assertEqual(books[0].category, self.category)
+
+        res = self.client.get(reverse("myapp:book-list"), {"q": "bulk"})
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_bulk_create_batches_queries(self):
+        items = [
+            {"name": f"Book {i}", "description": "Bulk", "author": self.author.id, "category": self.category.id}
+            for i in range(1200)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["created"]), 1200)
+        self.assertEqual(Book.objects.count(), 1200)
+        # Batched: SQLite caps an INSERT at 999 parameters, so ~140 rows each.
+        self.assertLess(len(queries), len(items) // 20)
+
+    def test_bulk_update(self):
+        books = [create_book(user=self.superuser, name=f"Book {i}") for i in range(2)]
+        items = [
+            {"id": books[0].id, "name": "Renamed"},
+            {"id": books[1].id, "category": None, "author": self.author.id},
+            {"name": "No id"},
+            {"id": books[1].id + 100, "name": "Missing"},
+        ]
+
+        res = self.client.patch(self.url, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["updated"], [books[0].id, books[1].id])
+        self.assertEqual([e["index"] for e in res.data["errors"]], [2, 3])
+
+        books[0].refresh_from_db()
+        books[1].refresh_from_db()
+        self.assertEqual(books[0].name, "Renamed")
+        self.assertIsNone(books[1].category)
+        self.assertEqual(books[1].author, self.author)
+
+    def test_bulk_delete(self):
+        books = [create_book(user=self.superuser) for _ in range(3)]
+
+        res = self.client.delete(self.url, [books[0].id, books[2].id, "x", 999], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["deleted"], [books[0].id, books[2].id])
+        self.assertEqual([e["index"] for e in res.data["errors"]], [2, 3])
+        self.assertEqual(list(Book.objects.values_list("id", flat=True)), [books[1].id])
+
+    def test_bulk_requires_list(self):
+        res = self.client.post(self.url, {"name": "Not a list"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_all_invalid(self):
+        res = self.client.post(self.url, [{"name": "No author"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], [])
+
+    def test_bulk_requires_admin(self):
+        self.client.force_authenticate(create_user())
+
+        res = self.client.post(self.url, [], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+# Export Tests
+class BookExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+
+    def export(self, **params):
+        res = self.client.get(reverse("myapp:book-export"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+
+    def test_export_all_books(self):
+        books = [create_book(user=self.user, name=f"Book {i}") for i in range(3)]
+        Book.objects.filter(pk=books[2].pk).update(category=None)
+
+        rows = self.export()
+
+        self.assertEqual([row["id"] for row in rows], [b.id for b in books])
+        self.assertEqual(rows[0]["name"], "Book 0")
+        self.assertEqual(rows[0]["author"], {"id": books[0].author.id, "name": "Example Author"})
+        self.assertEqual(rows[0]["category"], {"id": books[0].category.id, "name": "Test Category"})
+        self.assertIsNone(rows[2]["category"])
+        self.assertIn("avg_rating", rows[0])
+
+    def test_export_filters(self):
+        old = create_book(user=self.user)
+        new = create_book(user=self.user, category=old.category)
+        create_book(user=self.user)
+        Book.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+
+        self.assertEqual([row["id"] for row in self.export(category=old.category.id)], [old.id, new.id])
+        self.assertEqual([row["id"] for row in self.export(category=old.category.id, since=since)], [new.id])
+
+    def test_export_ignores_accept(self):
+        book = create_book(user=self.user)
+
+        res = self.client.get(reverse("myapp:book-export"), HTTP_ACCEPT="application/json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(json.loads(b"".join(res.streaming_content))["id"], book.id)
+
+    def test_export_invalid_since(self):
+        res = self.client.get(reverse("myapp:book-export"), {"since": "yesterday"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(b"since", res.content)
+
+    def test_rating_change_touches_updated_at(self):
+        book = create_book(user=self.user)
+        Book.objects.filter(pk=book.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        Book.objects.update_rating(book.id, added=4)
+
+        book.refresh_from_db()
+        self.assertGreater(book.updated_at, timezone.now() - timedelta(minutes=1))
@@ -0,0 +1,178 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..cache import catalog_cache, get_versions, version_key
+from ..models import Author, Book, Category, Review
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.author = Author.objects.create(user=self.superuser, name="Example Author")
+        self.category = Category.objects.create(name="Test Category")
+        self.book = Book.objects.create(
+            user=self.superuser, name="Cached Book", category=self.category, author=self.author
+        )
+
+    def test_repeat_reads_served_from_cache(self):
+        for url in [
+            reverse("myapp:book-list"),
+            reverse("myapp:book-detail", args=[self.book.id]),
+            reverse("myapp:author-list"),
+            reverse("myapp:category-list"),
+        ]:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+
+                self.assertEqual(second.status_code, status.HTTP_200_OK)
+                self.assertEqual(second.json(), first.json())
+
+    def test_query_params_cached_separately(self):
+        other = Book.objects.create(user=self.superuser, name="Other Book", author=self.author)
+
+        res = self.client.get(reverse("myapp:book-list"), {"author": self.author.id})
+        self.assertEqual(len(res.data["results"]), 2)
+
+        res = self.client.get(reverse("myapp:book-list"), {"q": "other"})
+        self.assertEqual([b["id"] for b in res.data["results"]], [other.id])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "books.example.com"])
+    def test_hosts_cached_separately(self):
+        Book.objects.create(user=self.superuser, name="Other Book", author=self.author)
+        url = reverse("myapp:book-list")
+
+        self.client.get(url, {"page_size": 1})
+        res = self.client.get(url, {"page_size": 1}, HTTP_HOST="books.example.com", secure=True)
+
+        self.assertTrue(res.data["next"].startswith("https://books.example.com/"))
+
+    def test_writes_invalidate_cached_reads(self):
+        url = reverse("myapp:book-detail", args=[self.book.id])
+        self.client.get(url)
+
+        self.client.force_authenticate(self.superuser)
+        self.client.patch(url, {"name": "Renamed Book"}, format="json")
+
+        self.assertEqual(self.client.get(url).data["name"], "Renamed Book")
+
+    def test_reviews_invalidate_cached_ratings(self):
+        url = reverse("myapp:book-detail", args=[self.book.id])
+        self.assertEqual(self.client.get(url).data["number_rating"], 0)
+
+        Review.objects.create(user=self.superuser, rating=4, book=self.book)
+
+        self.assertEqual(self.client.get(url).data["number_rating"], 1)
+
+    def test_related_writes_invalidate_cached_reads(self):
+        url = reverse("myapp:author-list")
+        self.client.get(url)
+
+        Author.objects.create(user=self.superuser, name="New Author")
+
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+    def test_username_change_invalidates_cached_reads(self):
+        urls = [reverse("myapp:book-list"), reverse("myapp:author-list"), reverse("myapp:book-top")]
+        for url in urls:
+            self.client.get(url)
+
+        self.superuser.username = "renamed"
+        self.superuser.save()
+
+        self.assertEqual(self.client.get(urls[0]).data["results"][0]["user"], "renamed")
+        self.assertEqual(self.client.get(urls[1]).data[0]["user"], "renamed")
+        self.assertEqual(self.client.get(urls[2]).data[0]["user"], "renamed")
+
+    def test_evicted_version_never_reuses_entries(self):
+        url = reverse("myapp:category-list")
+        self.client.get(url)
+        old_version = get_versions(["category"])
+
+        catalog_cache().delete(version_key("category"))
+
+        self.assertNotEqual(get_versions(["category"]), old_version)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_error_responses_not_cached(self):
+        url = reverse("myapp:book-detail", args=[self.book.id + 100])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.author = Author.objects.create(user=self.superuser, name="Example Author")
+        self.category = Category.objects.create(name="Test Category")
+        self.book = Book.objects.create(
+            user=self.superuser, name="Tagged Book", category=self.category, author=self.author
+        )
+
+    def test_not_modified_without_queries(self):
+        for url in [
+            reverse("myapp:book-list") + f"?category={self.category.id}",
+            reverse("myapp:book-detail", args=[self.book.id]),
+            reverse("myapp:author-detail", args=[self.author.id]),
+            reverse("myapp:category-list"),
+        ]:
+            with self.subTest(url=url):
+                res = self.client.get(url)
+                etag = res["ETag"]
+                self.assertTrue(etag.startswith('"'))
+
+                with self.assertNumQueries(0):
+                    res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(res["ETag"], etag)
+                self.assertEqual(res.content, b"")
+
+    def test_wildcard_does_not_hide_missing_resource(self):
+        url = reverse("myapp:book-detail", args=[self.book.id + 100])
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_write_changes_etag(self):
+        url = reverse("myapp:book-detail", args=[self.book.id])
+        etag = self.client.get(url)["ETag"]
+
+        self.book.name = "Renamed Book"
+        self.book.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["name"], "Renamed Book")
+
+    def test_etag_differs_per_query_and_format(self):
+        url = reverse("myapp:book-list")
+        etag = self.client.get(url)["ETag"]
+
+        self.assertNotEqual(self.client.get(url, {"category": self.category.id})["ETag"], etag)
+        self.assertNotEqual(self.client.get(url, HTTP_ACCEPT="text/html")["ETag"], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"stale", {etag}').status_code, status.HTTP_304_NOT_MODIFIED)
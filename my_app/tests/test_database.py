@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 20000)
+        self.assertEqual(self.pragma("cache_size"), -65536)
+
+    def test_immediate_transactions(self):
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+    def test_persistent_connections(self):
+        self.assertEqual(connection.settings_dict["CONN_MAX_AGE"], settings.SQLITE_CONN_MAX_AGE)
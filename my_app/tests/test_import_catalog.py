@@ -0,0 +1,115 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from ..models import Author, Book, Category, Review
+from ..search import search_books
+
+
+class ImportCatalogTests(TestCase):
+    def setUp(self):
+        self.superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.readers = [
+            get_user_model().objects.create_user(
+                username=f"reader{i}", email=f"reader{i}@user.com", password="readerpass"
+            )
+            for i in range(3)
+        ]
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.tmp.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def write_jsonl(self, name, rows):
+        return self.write(name, "".join(json.dumps(row) + "\n" for row in rows))
+
+    def test_import_full_catalog(self):
+        authors = self.write("authors.csv", "id,name,country,date_of_birth\na1,Ursula Le Guin,US,1929-10-21\na2,Frank Herbert,US,\n")
+        categories = self.write("categories.csv", "id,name,description\nsf,Science Fiction,Spaceships\n")
+        books = self.write_jsonl("books.jsonl", [
+            {"id": "b1", "name": "Earthsea", "description": "Wizards", "author": "a1", "category": "sf"},
+            {"id": "b2", "name": "Dune", "description": "Desert", "author": "a2", "category": ""},
+            {"id": "b3", "name": "Orphan", "description": "No author", "author": "a9", "category": "sf"},
+        ])
+        reviews = self.write("reviews.csv", "user,book,rating,comment\n"
+                             "reader0,b1,5,Great\nreader1,b1,4,\nreader0,b2,2,\n"
+                             "reader0,b1,1,Duplicate\nghost,b1,3,\nreader2,b3,3,\nreader2,b2,9,\n")
+        out = StringIO()
+
+        call_command(
+            "import_catalog", authors=authors, categories=categories, books=books, reviews=reviews,
+            batch_size=2, stdout=out,
+        )
+
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(str(Author.objects.get(name="Ursula Le Guin").date_of_birth), "1929-10-21")
+        self.assertEqual(Category.objects.count(), 1)
+        self.assertEqual(sorted(Book.objects.values_list("name", flat=True)), ["Dune", "Earthsea"])
+        self.assertIsNone(Book.objects.get(name="Dune").category)
+        self.assertEqual(Book.objects.get(name="Dune").user, self.superuser)
+        self.assertEqual(Review.objects.count(), 3)
+
+        earthsea = Book.objects.get(name="Earthsea")
+        self.assertEqual(earthsea.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        self.assertAlmostEqual(earthsea.avg_rating, 4.5)
+        self.assertFalse(Book.objects.rating_mismatches().exists())
+
+        self.assertEqual(list(search_books(Book.objects.all(), "herbert")), [Book.objects.get(name="Dune")])
+        self.assertIn("books: imported 2, skipped 1", out.getvalue())
+        self.assertIn("rows/sec", out.getvalue())
+
+    def test_reviews_for_existing_books(self):
+        author = Author.objects.create(user=self.superuser, name="Existing Author")
+        book = Book.objects.create(user=self.superuser, name="Existing Book", author=author)
+        Review.objects.create(user=self.readers[0], rating=1, book=book)
+        reviews = self.write_jsonl("reviews.jsonl", [
+            {"user": "reader1", "book": book.id, "rating": 5},
+            {"user": "reader2", "book": book.id, "rating": 3},
+        ])
+
+        call_command("import_catalog", reviews=reviews, stdout=StringIO())
+
+        book.refresh_from_db()
+        self.assertEqual(book.number_rating, 3)
+        self.assertAlmostEqual(book.avg_rating, 3.0)
+
+    def test_duplicate_reviews_skipped(self):
+        author = Author.objects.create(user=self.superuser, name="Existing Author")
+        book = Book.objects.create(user=self.superuser, name="Existing Book", author=author)
+        Review.objects.create(user=self.readers[0], rating=1, book=book)
+        reviews = self.write_jsonl("reviews.jsonl", [
+            {"user": "reader0", "book": book.id, "rating": 5},
+            {"user": "reader1", "book": book.id, "rating": 4},
+            {"user": "reader1", "book": book.id, "rating": 2},
+        ])
+        out = StringIO()
+
+        call_command("import_catalog", reviews=reviews, stdout=out)
+
+        self.assertIn("reviews: imported 1, skipped 2", out.getvalue())
+        self.assertEqual(Review.objects.get(user=self.readers[1]).rating, 4)
+        self.assertEqual(Review.objects.get(user=self.readers[0]).rating, 1)
+
+    def test_unknown_owner(self):
+        with self.assertRaises(CommandError):
+            call_command("import_catalog", user="nobody", stdout=StringIO())
+
+    def test_unsupported_format(self):
+        path = self.write("authors.xml", "<authors/>")
+
+        with self.assertRaises(CommandError):
+            call_command("import_catalog", authors=path, stdout=StringIO())
@@ -163,4 +163,12 @@ class ModelTests(TestCase):
 
         review_str = str(review.rating) + " | " + str(review.book) + " | " + str(review.user)
 
-        self.assertEqual(str(review), review_str)
\ No newline at end of file
+        self.assertEqual(str(review), review_str)
+
+    def test_review_unique_per_book_user(self):
+        user = create_superuser()
+        book = create_book(user=user)
+        Review.objects.create(user=user, rating=4, book=book)
+
+        with self.assertRaises(IntegrityError):
+            Review.objects.create(user=user, rating=2, book=book)
@@ -0,0 +1,107 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..cache import catalog_cache
+from ..models import Author, Book, Category, Review
+
+
+ROW_COUNTS = [1, 100, 1000]
+PAGE_SIZE = 500
+
+
+def create_users(count, offset=0):
+    return get_user_model().objects.bulk_create(
+        get_user_model()(
+            username=f"budgetuser{i}",
+            email=f"budget{i}@user.com",
+            password="!",
+        )
+        for i in range(offset, offset + count)
+    )
+
+
+class QueryBudgetTests(TestCase):
+    """Every list endpoint must run a fixed number of queries, whatever its size."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = create_users(1)[0]
+        self.author = Author.objects.create(user=self.owner, name="Budget Author")
+        self.category = Category.objects.create(name="Budget Category")
+
+    def assertQueryBudget(self, url, budget, seed):
+        """
+        Grow the data set to each of ROW_COUNTS with `seed(count)` and check
+        that `url` stays within `budget` queries at every size.
+        """
+        seeded = 0
+        for rows in ROW_COUNTS:
+            seed(rows - seeded)
+            seeded = rows
+
+            # Budgets cover the uncached path; see my_app.cache.
+            catalog_cache().clear()
+
+            with self.subTest(url=url, rows=rows):
+                with CaptureQueriesContext(connection) as queries:
+                    res = self.client.get(url, {"page_size": PAGE_SIZE})
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertLessEqual(
+                    len(queries), budget,
+                    f"{url} ran {len(queries)} queries for {rows} rows "
+                    f"(budget {budget}):\n"
+                    + "\n".join(q["sql"] for q in queries.captured_queries),
+                )
+
+    def seed_books(self, count):
+        Book.objects.bulk_create(
+            Book(user=self.owner, name="Budget Book", description="", category=self.category, author=self.author)
+            for _ in range(count)
+        )
+
+    def test_book_list_budget(self):
+        self.assertQueryBudget(reverse("myapp:book-list"), 1, self.seed_books)
+
+    def test_author_list_budget(self):
+        def seed(count):
+            Author.objects.bulk_create(
+                Author(user=self.owner, name="Budget Author") for _ in range(count)
+            )
+
+        self.assertQueryBudget(reverse("myapp:author-list"), 1, seed)
+
+    def test_category_list_budget(self):
+        def seed(count):
+            Category.objects.bulk_create(
+                Category(name="Budget Category") for _ in range(count)
+            )
+
+        self.assertQueryBudget(reverse("myapp:category-list"), 1, seed)
+
+    def test_book_reviews_budget(self):
+        book = Book.objects.create(user=self.owner, name="Budget Book", author=self.author)
+        offset = 1
+
+        def seed(count):
+            nonlocal offset
+            users = create_users(count, offset=offset)
+            offset += count
+            Review.objects.bulk_create(Review(user=user, rating=3, book=book) for user in users)
+
+        self.assertQueryBudget(reverse("myapp:book-reviews", args=[book.id]), 1, seed)
+
+    def test_user_reviews_budget(self):
+        def seed(count):
+            books = Book.objects.bulk_create(
+                Book(user=self.owner, name="Budget Book", author=self.author) for _ in range(count)
+            )
+            Review.objects.bulk_create(Review(user=self.owner, rating=3, book=book) for book in books)
+
+        self.assertQueryBudget(reverse("myapp:user-reviews", args=[self.owner.id]), 1, seed)
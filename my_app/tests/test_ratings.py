@@ -0,0 +1,226 @@
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import Author, Book, RatingPrior, Review
+from ..ratings import rating_aggregator
+
+
+def create_users(count):
+    return [
+        get_user_model().objects.create_user(
+            username=f"rater{i}", email=f"rater{i}@user.com", password="raterpass"
+        )
+        for i in range(count)
+    ]
+
+
+@override_settings(RATING_WRITE_BEHIND=True, RATING_FLUSH_INTERVAL=0, RATING_FLUSH_BATCH_SIZE=1000)
+class WriteBehindRatingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.users = create_users(3)
+        author = Author.objects.create(user=self.users[0], name="Example Author")
+        self.book = Book.objects.create(user=self.users[0], name="Hot Book", author=author)
+
+    def tearDown(self):
+        rating_aggregator.flush()
+
+    def post_review(self, user, rating):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse("myapp:book-reviews", args=[self.book.id]), {"rating": rating}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_reviews_apply_immediately_ratings_on_flush(self):
+        for user, rating in zip(self.users, [5, 4, 4]):
+            self.post_review(user, rating)
+
+        self.assertEqual(Review.objects.filter(book=self.book).count(), 3)
+        self.assertEqual(rating_aggregator.pending(), {self.book.id: {5: 1, 4: 2}})
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.number_rating, 0)
+
+        self.assertEqual(rating_aggregator.flush(), 1)
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.number_rating, 3)
+        self.assertAlmostEqual(self.book.avg_rating, 13 / 3)
+        self.assertFalse(Book.objects.rating_mismatches().exists())
+
+    def test_update_and_delete_merge_into_pending(self):
+        self.post_review(self.users[0], 5)
+        review = Review.objects.get(user=self.users[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(reverse("myapp:review-detail", args=[review.id]), {"rating": 2}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(rating_aggregator.pending(), {self.book.id: {5: 0, 2: 1}})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("myapp:review-detail", args=[review.id]))
+        rating_aggregator.flush()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertFalse(Book.objects.rating_mismatches().exists())
+
+    @override_settings(RATING_FLUSH_BATCH_SIZE=2)
+    def test_flush_on_batch_size(self):
+        self.post_review(self.users[0], 3)
+        self.assertEqual(rating_aggregator.pending(), {self.book.id: {3: 1}})
+
+        self.post_review(self.users[1], 5)
+
+        self.assertEqual(rating_aggregator.pending(), {})
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.number_rating, 2)
+
+    def test_failed_flush_keeps_deltas(self):
+        self.post_review(self.users[0], 3)
+
+        with mock.patch.object(Book.objects, "apply_rating_deltas", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                rating_aggregator.flush()
+
+        self.assertEqual(rating_aggregator.pending(), {self.book.id: {3: 1}})
+
+
+@override_settings(RATING_WRITE_BEHIND=True, RATING_FLUSH_INTERVAL=0)
+class WriteBehindTransactionTests(TransactionTestCase):
+    # The deferred foreign key check only runs on a real commit.
+    def test_review_for_missing_book(self):
+        user = create_users(1)[0]
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.post(reverse("myapp:book-reviews", args=[100]), {"rating": 5}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(rating_aggregator.pending(), {})
+
+
+class ReconcileRatingsTests(TestCase):
+    def setUp(self):
+        users = create_users(2)
+        author = Author.objects.create(user=users[0], name="Example Author")
+        self.book = Book.objects.create(user=users[0], name="Book", author=author)
+        for user, rating in zip(users, [5, 2]):
+            Review.objects.create(user=user, rating=rating, book=self.book)
+
+    def test_consistent_ratings(self):
+        self.assertFalse(Book.objects.rating_mismatches().exists())
+        call_command("reconcile_ratings", stdout=StringIO())
+
+    def test_detect_and_fix_drift(self):
+        Book.objects.filter(pk=self.book.pk).update(avg_rating=4.9, rating_5=7)
+
+        self.assertEqual(list(Book.objects.rating_mismatches()), [self.book])
+        with self.assertRaises(CommandError):
+            call_command("reconcile_ratings", stdout=StringIO())
+
+        call_command("reconcile_ratings", "--fix", stdout=StringIO())
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+        self.assertAlmostEqual(self.book.avg_rating, 3.5)
+        self.assertFalse(Book.objects.rating_mismatches().exists())
+
+    def test_fix_invalidates_cached_books(self):
+        url = reverse("myapp:book-detail", args=[self.book.id])
+        Book.objects.filter(pk=self.book.pk).update(avg_rating=0.0)
+        self.assertEqual(APIClient().get(url).data["avg_rating"], 0.0)
+
+        call_command("reconcile_ratings", "--fix", stdout=StringIO())
+
+        self.assertAlmostEqual(APIClient().get(url).data["avg_rating"], 3.5)
+
+    @override_settings(RATING_WRITE_BEHIND=True, RATING_FLUSH_INTERVAL=0)
+    def test_write_behind_rechecks_after_flush_interval(self):
+        drift = Book.objects.filter(pk=self.book.pk).update
+        drift(rating_5=7)
+
+        def worker_flushes(seconds):
+            Book.objects.recompute_ratings()
+
+        with mock.patch("my_app.management.commands.reconcile_ratings.time.sleep", side_effect=worker_flushes):
+            call_command("reconcile_ratings", stdout=StringIO())
+
+        drift(rating_5=7)
+        with self.assertRaises(CommandError):
+            call_command("reconcile_ratings", stdout=StringIO())
+
+    @override_settings(RATING_WRITE_BEHIND=True)
+    def test_fix_refused_with_write_behind(self):
+        Book.objects.filter(pk=self.book.pk).update(avg_rating=4.9, rating_5=7)
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_ratings", "--fix", stdout=StringIO())
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_5, 7)
+
+
+@override_settings(RATING_PRIOR_VOTES=10, RATING_PRIOR_MEAN=3.0)
+class WeightedRatingTests(TestCase):
+    def setUp(self):
+        RatingPrior.objects.all().delete()
+        self.client = APIClient()
+        self.users = create_users(3)
+        author = Author.objects.create(user=self.users[0], name="Example Author")
+        self.book = Book.objects.create(user=self.users[0], name="Book", author=author)
+
+    def test_weighted_rating_follows_reviews(self):
+        self.assertEqual(self.book.weighted_rating, 0)
+
+        self.client.force_authenticate(self.users[0])
+        res = self.client.post(reverse("myapp:book-reviews", args=[self.book.id]), {"rating": 5}, format="json")
+        self.book.refresh_from_db()
+        # (5 + 10 * 3.0) / (1 + 10)
+        self.assertAlmostEqual(self.book.weighted_rating, 35 / 11)
+
+        self.client.patch(reverse("myapp:review-detail", args=[res.data["id"]]), {"rating": 1}, format="json")
+        self.book.refresh_from_db()
+        self.assertAlmostEqual(self.book.weighted_rating, 31 / 11)
+
+        self.client.delete(reverse("myapp:review-detail", args=[res.data["id"]]))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.weighted_rating, 0)
+
+    def test_many_reviews_outrank_a_single_perfect_one(self):
+        single = Book.objects.create(user=self.users[0], name="Single", author=self.book.author)
+        Book.objects.apply_rating_deltas(single.id, {5: 1})
+        Book.objects.apply_rating_deltas(self.book.id, {5: 8000, 4: 2000})
+
+        single.refresh_from_db()
+        self.book.refresh_from_db()
+        self.assertGreater(single.avg_rating, self.book.avg_rating)
+        self.assertGreater(self.book.weighted_rating, single.weighted_rating)
+
+    def test_refresh_prior(self):
+        for user, rating in zip(self.users, [5, 5, 2]):
+            Review.objects.create(user=user, rating=rating, book=self.book)
+
+        out = StringIO()
+        call_command("refresh_rating_prior", stdout=out)
+
+        self.assertAlmostEqual(RatingPrior.objects.get().mean, 4.0)
+        self.book.refresh_from_db()
+        self.assertAlmostEqual(self.book.weighted_rating, (12 + 10 * 4.0) / 13)
+        self.assertFalse(Book.objects.rating_mismatches().exists())
+
+        Book.objects.filter(pk=self.book.pk).update(weighted_rating=1.0)
+        call_command("refresh_rating_prior", stdout=out)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.weighted_rating, 1.0)
+        self.assertIn("unchanged", out.getvalue())
@@ -0,0 +1,203 @@
+from io import StringIO
+from unittest import skipIf
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .. import recommendations
+from ..cache import catalog_cache
+from ..models import Author, Book, Category, Review, SimilarBook
+
+
+def create_users(count):
+    return [
+        get_user_model().objects.create_user(
+            username=f"reader{i}", email=f"reader{i}@user.com", password="readerpass"
+        )
+        for i in range(count)
+    ]
+
+
+@skipIf(recommendations.np is None, "NumPy and SciPy are not installed")
+class BuildSimilarBooksTests(TestCase):
+    def setUp(self):
+        self.users = create_users(4)
+        author = Author.objects.create(user=self.users[0], name="Example Author")
+        self.books = [Book.objects.create(user=self.users[0], name=f"Book {i}", author=author) for i in range(4)]
+
+    def rate(self, ratings):
+        for user, row in zip(self.users, ratings):
+            for book, rating in zip(self.books, row):
+                if rating:
+                    Review.objects.create(user=user, book=book, rating=rating)
+
+    def neighbours(self, book):
+        return list(SimilarBook.objects.filter(book=book).order_by("-score").values_list("similar", flat=True))
+
+    def test_build(self):
+        a, b, c, d = self.books
+        self.rate([
+            [5, 5, 1, 0],
+            [4, 4, 2, 0],
+            [1, 1, 5, 0],
+            [5, 4, 1, 3],
+        ])
+        out = StringIO()
+
+        call_command("build_similar_books", stdout=out)
+
+        self.assertEqual(self.neighbours(a), [b.id])
+        self.assertEqual(self.neighbours(b), [a.id])
+        # C is rated against A and B, D by a single reader.
+        self.assertEqual(self.neighbours(c), [])
+        self.assertEqual(self.neighbours(d), [])
+        self.assertGreater(SimilarBook.objects.get(book=a).score, 0.9)
+        self.assertIn("Stored 2 similar book pairs", out.getvalue())
+
+    def test_blocks_and_top_k(self):
+        self.rate([
+            [5, 4, 4, 1],
+            [4, 5, 3, 2],
+            [2, 2, 1, 5],
+            [5, 5, 4, 1],
+        ])
+
+        call_command("build_similar_books", top_k=1, block_size=1, stdout=StringIO())
+        by_block = {
+            book.id: [(n.similar_id, round(n.score, 5)) for n in SimilarBook.objects.filter(book=book)]
+            for book in self.books
+        }
+        call_command("build_similar_books", top_k=1, stdout=StringIO())
+
+        for book in self.books:
+            neighbours = [(n.similar_id, round(n.score, 5)) for n in SimilarBook.objects.filter(book=book)]
+            self.assertLessEqual(len(neighbours), 1)
+            self.assertEqual(neighbours, by_block[book.id])
+
+    def test_rebuild_replaces_table(self):
+        a, b, c, d = self.books
+        SimilarBook.objects.create(book=a, similar=d, score=1.0)
+
+        call_command("build_similar_books", stdout=StringIO())
+
+        self.assertFalse(SimilarBook.objects.exists())
+
+
+class SimilarBooksApiTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        user = create_users(1)[0]
+        author = Author.objects.create(user=user, name="Example Author")
+        self.category = Category.objects.create(name="Test Category")
+        self.books = [
+            Book.objects.create(user=user, name=f"Book {i}", author=author, category=self.category if i % 2 else None)
+            for i in range(5)
+        ]
+        book = self.books[0]
+        for similar, score in zip(self.books[1:], [0.2, 0.9, 0.5, 0.7]):
+            SimilarBook.objects.create(book=book, similar=similar, score=score)
+        SimilarBook.objects.create(book=self.books[1], similar=book, score=0.2)
+
+    def similar(self, book, **params):
+        return self.client.get(reverse("myapp:book-similar", args=[book.id]), params)
+
+    def test_similar_books(self):
+        with self.assertNumQueries(2):
+            res = self.similar(self.books[0])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([b["id"] for b in res.data], [self.books[i].id for i in [2, 4, 3, 1]])
+        self.assertEqual(res.data[0]["similarity"], 0.9)
+        self.assertEqual(res.data[0]["name"], "Book 2")
+
+    def test_limit_category_and_fields(self):
+        self.assertEqual([b["id"] for b in self.similar(self.books[0], limit=2).data], [self.books[2].id, self.books[4].id])
+        self.assertEqual([b["id"] for b in self.similar(self.books[0], category=self.category.id).data], [self.books[3].id, self.books[1].id])
+        self.assertEqual(self.similar(self.books[0], limit=1, fields="id,similarity").data, [{"id": self.books[2].id, "similarity": 0.9}])
+        self.assertEqual(self.similar(self.books[0], limit=0).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_no_neighbours(self):
+        res = self.similar(self.books[4])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_missing_book(self):
+        res = self.client.get(reverse("myapp:book-similar", args=[self.books[-1].id + 100]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_uses_score_index(self):
+        plan = SimilarBook.objects.filter(book=self.books[0]).order_by("-score").explain()
+
+        self.assertIn("similar_book_score_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class RecommendationsApiTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.client = APIClient()
+        self.user, other = create_users(2)
+        author = Author.objects.create(user=other, name="Example Author")
+        self.books = [Book.objects.create(user=other, name=f"Book {i}", author=author) for i in range(6)]
+        a, b, c, d, e, _ = self.books
+        for book, similar, score in [(a, c, 0.8), (a, d, 0.5), (a, b, 0.3), (b, d, 0.9), (b, e, 0.4)]:
+            SimilarBook.objects.create(book=book, similar=similar, score=score)
+
+        Review.objects.create(user=self.user, book=a, rating=5)
+        Review.objects.create(user=self.user, book=b, rating=1)
+        self.client.force_authenticate(self.user)
+
+    def recommended(self, **params):
+        res = self.client.get(reverse("user:recommendations"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_recommendations(self):
+        a, b, c, d, e, _ = self.books
+
+        data = self.recommended()
+
+        self.assertEqual([book["id"] for book in data], [c.id, d.id, e.id])
+        # Mean 3, plus each neighbour's similarity-weighted vote.
+        self.assertAlmostEqual(data[0]["score"], 3 + 0.8 * 2 / (0.8 + 1))
+        self.assertAlmostEqual(data[1]["score"], 3 + (0.5 * 2 - 0.9 * 2) / (1.4 + 1))
+        self.assertEqual(data[0]["name"], "Book 2")
+        self.assertEqual([book["id"] for book in self.recommended(limit=1)], [c.id])
+
+    def test_cached_until_user_reviews(self):
+        c = self.books[2]
+        self.recommended()
+
+        with self.assertNumQueries(1):
+            self.recommended()
+
+        Review.objects.create(user=self.user, book=c, rating=4)
+        self.assertNotIn(c.id, [book["id"] for book in self.recommended()])
+
+    def test_no_reviews(self):
+        newcomer = get_user_model().objects.create_user(
+            username="newcomer", email="newcomer@user.com", password="readerpass"
+        )
+        self.client.force_authenticate(newcomer)
+
+        self.assertEqual(self.recommended(), [])
+
+    def test_invalid_limit(self):
+        for limit in ["many", 0, 101]:
+            with self.subTest(limit=limit):
+                res = self.client.get(reverse("user:recommendations"), {"limit": limit})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        res = APIClient().get(reverse("user:recommendations"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,93 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .. import parsers, renderers
+from ..models import Author, Book
+
+
+class FastJSONRendererTests(TestCase):
+    data = {
+        "name": "Čapek\u2028R.U.R.",
+        "histogram": {1: 0, 5: 2},
+        "created": datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        "born": datetime.date(1890, 1, 9),
+        "price": Decimal("9.99"),
+        "label": gettext_lazy("Book"),
+        "tags": ("sf", "play"),
+        "missing": None,
+    }
+
+    def test_matches_stdlib_renderer(self):
+        self.assertIsNotNone(renderers.orjson)
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indent(self):
+        for media_type in ["application/json; indent=2", "application/json; indent=4"]:
+            with self.subTest(media_type=media_type):
+                self.assertEqual(
+                    renderers.FastJSONRenderer().render(self.data, media_type),
+                    JSONRenderer().render(self.data, media_type),
+                )
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+
+class FastJSONParserTests(TestCase):
+    def test_parse(self):
+        body = '{"name": "Čapek", "rating": 5}'.encode()
+
+        self.assertEqual(parsers.FastJSONParser().parse(io.BytesIO(body)), {"name": "Čapek", "rating": 5})
+        with mock.patch.object(parsers, "orjson", None):
+            self.assertEqual(parsers.FastJSONParser().parse(io.BytesIO(body)), {"name": "Čapek", "rating": 5})
+
+    def test_invalid_json(self):
+        for body in [b'{"name": ', b'{"rating": NaN}']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    parsers.FastJSONParser().parse(io.BytesIO(body))
+
+
+class FastJSONApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser",
+            email="test@superuser.com",
+            password="superuserpass",
+        )
+        self.client.force_authenticate(self.superuser)
+        self.author = Author.objects.create(user=self.superuser, name="Example Author")
+
+    def test_round_trip(self):
+        res = self.client.post(
+            reverse("myapp:book-list"),
+            '{"name": "Fast Book", "description": "Quick", "author": %d}' % self.author.id,
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(reverse("myapp:book-detail", args=[res.data["id"]]))
+
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(res.json()["name"], "Fast Book")
+        self.assertEqual(res.json()["rating_histogram"], {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0})
+        self.assertEqual(Book.objects.get().name, "Fast Book")
+
+    def test_malformed_body(self):
+        res = self.client.post(reverse("myapp:book-list"), '{"name": ', content_type="application/json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,8 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
@@ -15,6 +17,11 @@ def create_user():
         password="passtestuser1"
     )
 
+def create_user_n(n):
+    return get_user_model().objects.create_user(
+        username=f"reader{n}", email=f"reader{n}@user.com", password="passreader"
+    )
+
 def create_book(user, **params):
     author = Author.objects.create(
             user=user,
@@ -176,16 +183,62 @@ class ReviewApiPrivateTests(APITestCase):
         review2 = Review.objects.create(
             user=self.user,
             rating=2,
-            book=self.book
+            book=create_book(user=self.user)
         )
 
         res = self.client.get(reverse("myapp:user-reviews", args=[self.user.id]))
 
-        reviews = Review.objects.all()
+        reviews = Review.objects.order_by("-id")
         serializer = ReviewSerializer(reviews, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_list_book_reviews_paginated(self):
+        for rating in [1, 2, 3]:
+            user = get_user_model().objects.create_user(
+                username=f"reviewer{rating}", email=f"reviewer{rating}@user.com", password="userpass"
+            )
+            Review.objects.create(user=user, rating=rating, book=self.book)
+
+        url = reverse("myapp:book-reviews", args=[self.book.id])
+        res = self.client.get(url, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["rating"] for r in res.data["results"]], [3, 2])
+        self.assertIsNotNone(res.data["next"])
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual([r["rating"] for r in res.data["results"]], [1])
+        self.assertIsNone(res.data["next"])
+
+    def test_list_reviews_selected_fields(self):
+        review = Review.objects.create(user=self.user, rating=4, book=self.book)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse("myapp:user-reviews", args=[self.user.id]), {"fields": "id,rating"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [{"id": review.id, "rating": 4}])
+        self.assertNotIn("comment", queries.captured_queries[0]["sql"])
+        self.assertNotIn("JOIN", queries.captured_queries[0]["sql"])
+
+    def test_list_reviews_expand_book(self):
+        for book in [self.book, create_book(user=self.user, name="Second Book")]:
+            Review.objects.create(user=self.user, rating=4, book=book)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("myapp:user-reviews", args=[self.user.id]), {"expand": "book"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["book"]["name"], "Second Book")
+        self.assertEqual(res.data["results"][1]["book"]["user"], self.user.username)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("myapp:book-reviews", args=[self.book.id]), {"expand": "book", "fields": "rating,book"})
+
+        self.assertEqual(res.data["results"][0]["book"]["id"], self.book.id)
 
     def test_update_other_users_review_fails(self):
         other_user = create_user()
@@ -220,4 +273,156 @@ class ReviewApiPrivateTests(APITestCase):
         res = self.client.delete(reverse("myapp:review-detail", args=[review.id]))
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
-        self.assertTrue(Review.objects.filter(id=review.id).exists())
\ No newline at end of file
+        self.assertTrue(Review.objects.filter(id=review.id).exists())
+
+# Rating Histogram Tests
+class ReviewRatingTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            email="test@user.com",
+            password="userpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.book = create_book(user=self.user)
+
+    def assertBookRating(self, histogram, avg_rating):
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_histogram, histogram)
+        self.assertEqual(self.book.number_rating, sum(histogram.values()))
+        self.assertAlmostEqual(self.book.avg_rating, avg_rating)
+
+    def test_create_review_counts_rating(self):
+        Review.objects.create(user=create_user(), rating=2, book=self.book)
+
+        res = self.client.post(reverse("myapp:book-reviews", args=[self.book.id]), {"rating": 5}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertBookRating({1: 0, 2: 1, 3: 0, 4: 0, 5: 1}, 3.5)
+
+    def test_create_duplicate_review_fails(self):
+        url = reverse("myapp:book-reviews", args=[self.book.id])
+        self.client.post(url, {"rating": 5}, format="json")
+
+        res = self.client.post(url, {"rating": 1}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Review.objects.filter(book=self.book, user=self.user).count(), 1)
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 1}, 5)
+
+    def test_create_review_for_missing_book(self):
+        res = self.client.post(reverse("myapp:book-reviews", args=[self.book.id + 100]), {"rating": 5}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Review.objects.exists())
+
+    def test_create_review_writes_without_reads(self):
+        url = reverse("myapp:book-reviews", args=[self.book.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(url, {"rating": 5}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        statements = [q["sql"].split()[0] for q in queries.captured_queries]
+        self.assertEqual([s for s in statements if s not in ("SAVEPOINT", "RELEASE")], ["INSERT", "UPDATE"])
+
+    def test_update_review_moves_rating(self):
+        review = Review.objects.create(user=self.user, rating=4, book=self.book)
+        Review.objects.create(user=create_user(), rating=2, book=self.book)
+
+        res = self.client.patch(reverse("myapp:review-detail", args=[review.id]), {"rating": 1}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertBookRating({1: 1, 2: 1, 3: 0, 4: 0, 5: 0}, 1.5)
+
+        res = self.client.patch(reverse("myapp:review-detail", args=[review.id]), {"comment": "Same rating"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertBookRating({1: 1, 2: 1, 3: 0, 4: 0, 5: 0}, 1.5)
+
+    def test_delete_review_uncounts_rating(self):
+        review = Review.objects.create(user=self.user, rating=4, book=self.book)
+
+        res = self.client.delete(reverse("myapp:review-detail", args=[review.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 0}, 0)
+
+    def test_update_deferred_review_counts_once(self):
+        review = Review.objects.create(user=self.user, rating=4, book=self.book)
+
+        deferred = Review.objects.defer("rating").get(pk=review.pk)
+        deferred.rating = 2
+        deferred.save()
+        self.assertBookRating({1: 0, 2: 1, 3: 0, 4: 0, 5: 0}, 2)
+
+        Review.objects.defer("book", "rating").get(pk=review.pk).delete()
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 0}, 0)
+
+    def test_update_review_by_pk_counts_once(self):
+        review = Review.objects.create(user=self.user, rating=4, book=self.book)
+
+        Review(pk=review.pk, user=self.user, rating=5, book=self.book).save()
+
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 1}, 5)
+
+    def test_concurrent_updates_move_stored_rating(self):
+        review = Review.objects.create(user=self.user, rating=3, book=self.book)
+        first, second = Review.objects.get(pk=review.pk), Review.objects.get(pk=review.pk)
+
+        first.rating = 5
+        first.save()
+        second.rating = 1
+        second.save()
+
+        self.assertBookRating({1: 1, 2: 0, 3: 0, 4: 0, 5: 0}, 1)
+
+    def test_concurrent_deletes_uncount_once(self):
+        review = Review.objects.create(user=self.user, rating=3, book=self.book)
+        Review.objects.create(user=create_user(), rating=5, book=self.book)
+        first, second = Review.objects.get(pk=review.pk), Review.objects.get(pk=review.pk)
+
+        first.delete()
+        second.delete()
+
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 1}, 5)
+
+    def test_delete_book_skips_rating_updates(self):
+        for i in range(5):
+            Review.objects.create(user=create_user_n(i), rating=4, book=self.book)
+        # Drifted counts must not block the delete either.
+        Book.objects.filter(pk=self.book.pk).update(rating_4=0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.book.delete()
+
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse([q for q in queries if q["sql"].startswith('UPDATE "my_app_book"')])
+
+    def test_delete_user_uncounts_reviews(self):
+        reader = create_user()
+        Review.objects.create(user=reader, rating=2, book=self.book)
+        Review.objects.create(user=self.user, rating=4, book=self.book)
+
+        reader.delete()
+
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 1, 5: 0}, 4)
+
+    def test_rating_update_is_single_query(self):
+        with self.assertNumQueries(1):
+            Book.objects.update_rating(self.book.id, added=5, removed=None)
+
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 1}, 5)
+
+    def test_rating_fields_read_only(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.patch(
+            reverse("myapp:book-detail", args=[self.book.id]), {"avg_rating": 5, "number_rating": 99}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertBookRating({1: 0, 2: 0, 3: 0, 4: 0, 5: 0}, 0)
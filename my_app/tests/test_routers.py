@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..cache import catalog_cache
+from ..models import Author, Book, Category
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TransactionTestCase):
+    """The `replica` test database starts empty, so replica reads find nothing."""
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        catalog_cache().clear()
+        cache.clear()
+        self.superuser = get_user_model().objects.create_superuser(
+            username="testsuperuser", email="test@superuser.com", password="superuserpass"
+        )
+        author = Author.objects.create(user=self.superuser, name="Example Author")
+        self.book = Book.objects.create(user=self.superuser, name="Primary Book", author=author)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.superuser).key}")
+
+        other = get_user_model().objects.create_user(username="other", email="other@user.com", password="otherpass")
+        self.other_client = APIClient()
+        self.other_client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=other).key}")
+
+    def test_catalog_reads_use_replica(self):
+        res = self.other_client.get(reverse("myapp:book-list"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
+
+        res = self.other_client.get(reverse("myapp:book-detail", args=[self.book.id]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.other_client.get(reverse("myapp:book-reviews", args=[self.book.id]))
+        self.assertEqual(res.data["results"], [])
+
+    def test_auth_reads_use_primary(self):
+        res = self.other_client.get(reverse("user:me"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["username"], "other")
+
+    def test_writes_go_to_primary_and_pin_writer(self):
+        res = self.client.post(reverse("myapp:category-list"), {"name": "New Category", "description": "Added"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Category.objects.using("default").filter(name="New Category").exists())
+        self.assertFalse(Category.objects.using("replica").exists())
+
+        res = self.client.get(reverse("myapp:category-list"))
+        self.assertEqual([category["name"] for category in res.data], ["New Category"])
+
+        res = self.other_client.get(reverse("myapp:category-list"))
+        self.assertEqual(res.data, [])
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.post(reverse("myapp:category-list"), {"name": "New Category", "description": "Added"})
+
+        res = self.client.get(reverse("myapp:category-list"))
+        self.assertEqual(res.data, [])
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=7)
+    def test_replica_responses_cached_briefly(self):
+        cache = catalog_cache()
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            self.other_client.get(reverse("myapp:book-list"))
+            self.client.post(reverse("myapp:category-list"), {"name": "New Category", "description": "Added"})
+            self.client.get(reverse("myapp:category-list"))
+
+        timeouts = [c.kwargs["timeout"] for c in cache_set.call_args_list if c.args[0].startswith("catalog:response:")]
+        self.assertEqual(timeouts, [7, None])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        res = self.other_client.get(reverse("myapp:book-list"))
+
+        self.assertEqual([book["id"] for book in res.data["results"]], [self.book.id])
+
+    async def test_async_reads_use_replica(self):
+        res = await self.async_client.get(reverse("myapp:book-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], [])
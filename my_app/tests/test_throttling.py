@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from ..models import Author, Book
+from ..throttling import get_bucket_store, local_buckets
+
+
+def create_user(username):
+    return get_user_model().objects.create_user(
+        username=username, email=f"{username}@user.com", password="passtestuser"
+    )
+
+
+@mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {"login": "3/min", "register": "2/hour", "review": "2/min"})
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        self.addCleanup(local_buckets.clear)
+        self.client = APIClient()
+        self.user = create_user("reader")
+        author = Author.objects.create(user=self.user, name="Example Author")
+        self.books = [Book.objects.create(user=self.user, name=f"Book {i}", author=author) for i in range(4)]
+
+    def post_review(self, book, user=None):
+        self.client.force_authenticate(user or self.user)
+        return self.client.post(reverse("myapp:book-reviews", args=[book.id]), {"rating": 4}, format="json")
+
+    def test_review_burst_then_429(self):
+        for book in self.books[:2]:
+            self.assertEqual(self.post_review(book).status_code, status.HTTP_201_CREATED)
+
+        res = self.post_review(self.books[2])
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "30")
+        self.assertEqual(self.books[2].review_set.count(), 0)
+
+    def test_tokens_refill(self):
+        with mock.patch("my_app.throttling.time.monotonic", return_value=1000.0):
+            for book in self.books[:2]:
+                self.post_review(book)
+            self.assertEqual(self.post_review(self.books[2]).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        with mock.patch("my_app.throttling.time.monotonic", return_value=1030.0):
+            self.assertEqual(self.post_review(self.books[2]).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.post_review(self.books[3]).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_buckets_per_user_and_reads_unthrottled(self):
+        for book in self.books[:2]:
+            self.post_review(book)
+
+        self.assertEqual(self.post_review(self.books[0], user=create_user("other")).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(reverse("myapp:book-reviews", args=[self.books[0].id])).status_code, status.HTTP_200_OK)
+
+    def test_login_refused_before_password_check(self):
+        credentials = {"username": "reader", "password": "wrongpass"}
+        with mock.patch("user.serializers.authenticate", return_value=None) as authenticate:
+            for _ in range(3):
+                self.assertEqual(self.client.post(reverse("user:login"), credentials).status_code, status.HTTP_400_BAD_REQUEST)
+
+            res = self.client.post(reverse("user:login"), credentials)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+        self.assertEqual(authenticate.call_count, 3)
+
+    def test_register_by_ip(self):
+        def register(i, ip):
+            return self.client.post(reverse("user:register"), {
+                "username": f"new{i}", "email": f"new{i}@user.com", "name": "New User",
+                "password": "newpassword", "password2": "newpassword",
+            }, REMOTE_ADDR=ip)
+
+        self.assertEqual(register(1, "10.0.0.1").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(register(2, "10.0.0.1").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(register(3, "10.0.0.1").status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(register(3, "10.0.0.2").status_code, status.HTTP_201_CREATED)
+
+    def test_login_ignores_client_forwarded_for(self):
+        credentials = {"username": "reader", "password": "wrongpass"}
+        with mock.patch("user.serializers.authenticate", return_value=None):
+            statuses = [
+                self.client.post(reverse("user:login"), credentials, HTTP_X_FORWARDED_FOR=f"203.0.113.{i}").status_code
+                for i in range(5)
+            ]
+
+        self.assertEqual(statuses.count(status.HTTP_429_TOO_MANY_REQUESTS), 2)
+
+    @override_settings(THROTTLE_CACHE="default")
+    def test_shared_cache_backend(self):
+        get_bucket_store().clear()
+
+        for book in self.books[:2]:
+            self.post_review(book)
+
+        self.assertEqual(self.post_review(self.books[2]).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(local_buckets.get(f"throttle:review:user:{self.user.pk}"), None)
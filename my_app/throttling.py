@@ -0,0 +1,112 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+# Past this many buckets, full (idle) ones are dropped from the local store.
+LOCAL_PRUNE_SIZE = 100_000
+
+
+class LocalBuckets:
+    """
+    In-process bucket store. Each bucket is a single float swapped in with one
+    dict assignment, so there is no lock: threads racing on the same bucket
+    can at worst each let one extra request through.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+
+    def get(self, key):
+        return self._buckets.get(key)
+
+    def set(self, key, value, timeout):
+        self._buckets[key] = value
+        if len(self._buckets) > LOCAL_PRUNE_SIZE:
+            now = time.monotonic()
+            for stale in [key for key, full_at in list(self._buckets.items()) if full_at <= now]:
+                self._buckets.pop(stale, None)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheBuckets:
+    """Bucket store in a Django cache, shared by every process using it."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout=max(1, int(timeout) + 1))
+
+    def clear(self):
+        self.cache.clear()
+
+
+local_buckets = LocalBuckets()
+
+
+def get_bucket_store():
+    alias = getattr(settings, "THROTTLE_CACHE", None)
+    return CacheBuckets(alias) if alias else local_buckets
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle for the view's `throttle_scope`, with the rate
+    ("20/min") taken from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]. Clients
+    may burst the whole allowance at once and then get one request per
+    period / requests. Authenticated clients are keyed by user, anonymous
+    ones by IP (X-Forwarded-For only as far as NUM_PROXIES trusts it).
+
+    Each bucket is kept as the time it will be full again (GCRA), a single
+    number, in this process or, with THROTTLE_CACHE set, in that cache.
+    A refused request gets a 429 with Retry-After before the view does any
+    work.
+    """
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # The scope comes from the view in allow_request().
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None)
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.num_requests is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        store = get_bucket_store()
+        self.now = time.time() if isinstance(store, CacheBuckets) else time.monotonic()
+
+        interval = self.duration / self.num_requests
+        full_at = max(store.get(self.key) or self.now, self.now) + interval
+        self.retry_after = full_at - self.now - self.duration
+        if self.retry_after > 1e-9:
+            return False
+
+        store.set(self.key, full_at, timeout=full_at - self.now)
+        return True
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope) if self.scope else None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def wait(self):
+        return self.retry_after
@@ -1,33 +1,96 @@
-from .models import Author, Book, Review, Category
-from .serializers import AuthorSerializer, BookSerializer, ReviewSerializer, CategorySerializer
+from .models import Author, Book, Review, Category, LEADERBOARD_ORDERING
+from .serializers import AuthorSerializer, BookSerializer, BookBulkSerializer, SimilarBookSerializer, ReviewSerializer, CategorySerializer
 from .permissions import IsAdminOrReadOnly, IsReviewUserOrReadOnly
+from .pagination import BookCursorPagination, ReviewCursorPagination
+from .search import search_books
+from .cache import CachedReadMixin
+from .routers import ReplicaReadMixin
+from .bulk import bulk_create_books, bulk_update_books, bulk_delete_books
+from .export import aexport_books, export_books
+from .renderers import NDJSONRenderer
+from .throttling import TokenBucketThrottle
 
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from rest_framework import viewsets, generics
-from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, SAFE_METHODS
+from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import get_object_or_404
 
+from django.core.exceptions import FieldDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
 from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# SPARSE FIELDSETS & EXPANSIONS
+class SparseFieldsViewMixin:
+    """
+    Fit the SQL of GET requests to what the serializer will read: join the
+    relations `?expand=` embeds, and narrow to the columns and joins of the
+    `?fields=` trimmed serializer (see SparseFieldsMixin).
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        serializer = self.get_serializer()
+        columns = serializer.get_sparse_columns()
+        if columns is None:
+            related = serializer.get_select_related()
+            return queryset.select_related(*related) if related else queryset
+
+        # Cursor pagination reads the ordering fields off the page's rows.
+        if self.paginator is not None:
+            for term in self.paginator.get_ordering(self.request, queryset, self):
+                name = term.lstrip("-")
+                try:
+                    queryset.model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    continue
+                columns.add(name)
+
+        related = serializer.get_select_related()
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+
+        return queryset.only(*columns)
 
 # AUTHOR VIEW
-class AuthorViewSet(viewsets.ModelViewSet):
+class AuthorViewSet(ReplicaReadMixin, CachedReadMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = AuthorSerializer
-    queryset = Author.objects.all()
+    queryset = Author.objects.select_related("user")
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = ["author", "user"]
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 # CATEGORY VIEW
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ReplicaReadMixin, CachedReadMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = ["category"]
 
 # BOOK VIEW
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(ReplicaReadMixin, CachedReadMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = BookSerializer
-    queryset = Book.objects.all()
+    queryset = Book.objects.select_related("user")
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = BookCursorPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["id", "name", "avg_rating", "number_rating", "weighted_rating"]
+    cache_models = ["book", "author", "category", "review", "user"]
+    bulk_max_items = 10000
+    top_limit = 50
+    top_max_limit = 100
+    similar_limit = 10
+    similar_max_limit = 50
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -35,51 +98,189 @@ class BookViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         category = self.request.query_params.get('category')
         author = self.request.query_params.get('author')
+        q = self.request.query_params.get('q')
+        min_rating = self.request.query_params.get('min_rating')
+        min_reviews = self.request.query_params.get('min_reviews')
         queryset = self.queryset
 
         if category:
             queryset = queryset.filter(category=category)
         if author:
             queryset = queryset.filter(author=author)
+        if min_rating:
+            queryset = queryset.filter(avg_rating__gte=self._number_param('min_rating', min_rating, float))
+        if min_reviews:
+            queryset = queryset.filter(number_rating__gte=self._number_param('min_reviews', min_reviews, int))
+        if q:
+            queryset = search_books(queryset, q)
 
         return queryset
 
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk", serializer_class=BookBulkSerializer)
+    def bulk(self, request):
+        """
+        Create (POST), update (PATCH, items need an `id`) or delete (DELETE,
+        a list of ids) many books at once. Invalid items are reported by
+        index in `errors` without failing the rest of the batch.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({"non_field_errors": [f"At most {self.bulk_max_items} items per request."]})
+
+        if request.method == "POST":
+            done, errors = bulk_create_books(request.user, items)
+            key, success_status = "created", status.HTTP_201_CREATED
+        elif request.method == "PATCH":
+            done, errors = bulk_update_books(items)
+            key, success_status = "updated", status.HTTP_200_OK
+        else:
+            done, errors = bulk_delete_books(items)
+            key, success_status = "deleted", status.HTTP_200_OK
+
+        response_status = success_status if done or not errors else status.HTTP_400_BAD_REQUEST
+        return Response({key: done, "errors": errors}, status=response_status)
+
+    def perform_content_negotiation(self, request, force=False):
+        # The export is NDJSON whatever the client accepts (jobs often send
+        # Accept: application/json); this only picks how its errors render.
+        return super().perform_content_negotiation(request, force=force or self.action == "export")
+
+    @action(detail=False, methods=["get"], url_path="export", renderer_classes=[NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream every book as newline-delimited JSON, optionally only those in
+        `?category=` or changed at or after `?since=` (ISO 8601).
+        """
+        category = request.query_params.get('category')
+        since = request.query_params.get('since')
+        queryset = Book.objects.all()
+
+        if category:
+            queryset = queryset.filter(category=category)
+        if since:
+            since_datetime = parse_datetime(since)
+            if since_datetime is None:
+                raise ValidationError({"since": "A valid ISO 8601 datetime is required."})
+            if timezone.is_naive(since_datetime):
+                since_datetime = timezone.make_aware(since_datetime)
+            queryset = queryset.filter(updated_at__gte=since_datetime)
+
+        # Under ASGI a sync iterator would be read into memory before sending.
+        if isinstance(request._request, ASGIRequest):
+            rows = aexport_books(queryset)
+        else:
+            rows = export_books(queryset)
+
+        response = StreamingHttpResponse(rows, content_type=NDJSONRenderer.media_type)
+        response["Content-Disposition"] = 'attachment; filename="books.ndjson"'
+        return response
+
+    @action(detail=False, methods=["get"], url_path="top", filter_backends=[], pagination_class=None)
+    def top(self, request):
+        """
+        The `?limit=` best books by weighted rating, optionally only those in
+        `?category=` or by `?author=`. Read off the weighted rating indexes, so
+        the rest of the table is never sorted.
+        """
+        return self.cached_response(self.top_books, request)
+
+    def top_books(self, request):
+        limit = self._limit_param(self.top_limit, self.top_max_limit)
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*LEADERBOARD_ORDERING)[:limit]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=True, methods=["get"], url_path="similar", serializer_class=SimilarBookSerializer,
+        filter_backends=[], pagination_class=None, cache_models=["book", "author", "category", "similar", "user"],
+    )
+    def similar(self, request, pk=None):
+        """
+        The `?limit=` books most similar to this one by how the same readers
+        rated them, best first. Precomputed by `manage.py build_similar_books`,
+        so this is an index lookup.
+        """
+        return self.cached_response(self.similar_books, request, pk=pk)
+
+    def similar_books(self, request, pk=None):
+        book = get_object_or_404(Book.objects.only("id"), pk=pk)
+        limit = self._limit_param(self.similar_limit, self.similar_max_limit)
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(similar_to__book=book)
+            .annotate(similarity=F("similar_to__score"))
+            .order_by("-similarity", "-similar_to__id")[:limit]
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    def _limit_param(self, default, maximum):
+        limit = self._number_param('limit', self.request.query_params.get('limit', default), int)
+        if not 1 <= limit <= maximum:
+            raise ValidationError({"limit": f"Must be between 1 and {maximum}."})
+        return limit
+
+    def _number_param(self, name, value, cast):
+        try:
+            return cast(value)
+        except ValueError:
+            raise ValidationError({name: "A valid number is required."})
+
 # REVIEW VIEW
-class ReviewsListCreateView(generics.ListCreateAPIView):
+class ReviewsListCreateView(ReplicaReadMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = ReviewCursorPagination
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "review"
+
+    def get_throttles(self):
+        # Only posting reviews is throttled.
+        if self.request.method in SAFE_METHODS:
+            return []
+        return super().get_throttles()
 
     def get_queryset(self):
         book_id = self.kwargs['book_id']
-        return Review.objects.filter(book__id=book_id)
+        return Review.objects.filter(book__id=book_id).select_related("user")
 
     def perform_create(self, serializer):
         book_id = self.kwargs['book_id']
-        book = Book.objects.get(id=book_id)
-
-        user = self.request.user
-        review_queryset = Review.objects.filter(book=book, user=user)
 
-        if review_queryset.exists():
+        # One INSERT plus the rating UPDATE from my_app.signals, committed
+        # together. The unique (book, user) constraint rejects duplicates.
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user, book_id=book_id)
+        except IntegrityError:
+            if not Book.objects.filter(pk=book_id).exists():
+                raise NotFound("Book not found.")
             raise ValidationError("You are already reviewed this movie")
+        except Book.DoesNotExist:
+            raise NotFound("Book not found.")
 
-        new_rating = serializer.validated_data["rating"]
-        Book.objects.filter(pk=book_id).update(
-            avg_rating=((F('avg_rating') * F('number_rating')) + new_rating) / (F('number_rating') + 1),
-            number_rating=F('number_rating') + 1
-        )
-
-        serializer.save(user=user, book=book)
-
-class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Review.objects.all()
+class ReviewDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Review.objects.select_related("user")
     serializer_class = ReviewSerializer
     permission_classes = [IsReviewUserOrReadOnly]
 
-class UserReviewsView(generics.ListAPIView):
+    # Keep the review and its book's rating histogram in one transaction,
+    # which also locks the review while my_app.signals re-reads its rating.
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+class UserReviewsView(ReplicaReadMixin, SparseFieldsViewMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
+    pagination_class = ReviewCursorPagination
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        return Review.objects.filter(user__id=user_id)
+        return Review.objects.filter(user__id=user_id).select_related("user")
 
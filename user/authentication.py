@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    Bounded LRU of authenticated (user, token) pairs by token key, each
+    kept for at most TOKEN_CACHE_TTL seconds. Entries are dropped in this
+    process on logout and user changes (see user.signals); the TTL bounds
+    how long other processes can keep serving them.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return getattr(settings, "TOKEN_CACHE_SIZE", 10000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "TOKEN_CACHE_TTL", 60)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, user, token = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+        # Copies, so a request changing its user can't touch the cached one.
+        return copy.copy(user), copy.copy(token)
+
+    def set(self, key, user, token):
+        if self.maxsize < 1 or self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.copy(user), copy.copy(token))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (_, user, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the token/user SELECT for keys it has
+    recently authenticated. Unknown keys and inactive users still go to the
+    database and fail the same way.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
@@ -0,0 +1,110 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ins in progress, try again shortly."
+    default_code = "password_hashing_busy"
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        # Sent as Retry-After by DRF's exception handler.
+        self.wait = 1
+
+
+def setup_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def hash_password(password):
+    return hashers.make_password(password)
+
+
+def verify_password(password, encoded):
+    """Whether `password` matches `encoded`, and whether the hash should be upgraded."""
+    upgrade = []
+    valid = hashers.check_password(password, encoded, setter=upgrade.append)
+    return valid, bool(upgrade)
+
+
+class PasswordPool:
+    """
+    Password hashing and verification on a pool of PASSWORD_HASHING_WORKERS
+    processes, so a burst of logins uses every core and leaves the request
+    threads free. At most PASSWORD_HASHING_QUEUE_DEPTH jobs run or wait at
+    once; past that a request fails straight away with PasswordHashingBusy
+    (503 with Retry-After) instead of queueing behind the others.
+
+    With PASSWORD_HASHING_WORKERS = 0 hashing runs inline.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._slots = None
+
+    @property
+    def workers(self):
+        return getattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+
+    @property
+    def queue_depth(self):
+        return getattr(settings, "PASSWORD_HASHING_QUEUE_DEPTH", 64)
+
+    def make_password(self, password):
+        if password is None:
+            return hashers.make_password(None)
+        return self.run(hash_password, password)
+
+    def check_password(self, password, encoded):
+        if password is None or not hashers.is_password_usable(encoded):
+            return hashers.check_password(password, encoded), False
+        return self.run(verify_password, password, encoded)
+
+    def run(self, func, *args):
+        if self.workers < 1:
+            return func(*args)
+
+        executor, slots = self.get_executor()
+        if not slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            # A worker died; start a new pool for the next request.
+            self.shutdown()
+            raise PasswordHashingBusy()
+        finally:
+            slots.release()
+
+    def get_executor(self):
+        with self._lock:
+            # A pool can't be shared across fork(): start one per process.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=setup_worker)
+                self._pid = os.getpid()
+                self._slots = threading.BoundedSemaphore(self.queue_depth)
+            return self._executor, self._slots
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool()
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+
+# Drop cached authentications (user.authentication) when a token is deleted
+# (logout) or its user changes: password, deactivation or profile edits.
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_saved_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
@@ -1,9 +1,15 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from django.contrib.auth.hashers import make_password
+
+from .authentication import TokenCache, token_cache
+from .hashing import PasswordPool, password_pool
+
 def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
@@ -176,4 +182,154 @@ class PrivateUserTests(TestCase):
     def test_post_me_not_allowed(self):
         res = self.client.post(reverse("user:me"), {})
 
-        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class TokenAuthCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user(
+            username="testuser",
+            email="testuser@email.com",
+            name="Test User",
+            password="newuserpass"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeat_requests_skip_token_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse("user:me")).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse("user:me"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["username"], "testuser")
+
+    def test_bad_token_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse("user:me")).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(token_cache), 0)
+
+    def test_logout(self):
+        self.client.get(reverse("user:me"))
+
+        res = self.client.post(reverse("user:logout"))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get(reverse("user:me")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_evicts(self):
+        self.client.get(reverse("user:me"))
+
+        self.client.patch(reverse("user:me"), {"password": "changedpass", "password2": "changedpass"})
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("user:me"))
+
+    def test_deactivation(self):
+        self.client.get(reverse("user:me"))
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(reverse("user:me")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_reads_stored_user(self):
+        self.client.get(reverse("user:me"))
+        # Changed by another process: this one's cache isn't told.
+        get_user_model().objects.filter(pk=self.user.pk).update(password=make_password("otherpass"))
+
+        res = self.client.patch(reverse("user:me"), {"name": "Renamed"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "Renamed")
+        self.assertTrue(self.user.check_password("otherpass"))
+
+    def test_update_after_deactivation_elsewhere(self):
+        self.client.get(reverse("user:me"))
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.patch(reverse("user:me"), {"name": "Renamed"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, "Test User")
+
+    @override_settings(TOKEN_CACHE_TTL=0)
+    def test_ttl(self):
+        self.client.get(reverse("user:me"))
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("user:me"))
+
+    @override_settings(TOKEN_CACHE_SIZE=2)
+    def test_least_recently_used_evicted(self):
+        cache = TokenCache()
+        for key in ["a", "b"]:
+            cache.set(key, self.user, self.token)
+        cache.get("a")
+
+        cache.set("c", self.user, self.token)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+class PasswordPoolTests(TestCase):
+    def setUp(self):
+        self.user = create_user(
+            username="testuser",
+            email="testuser@email.com",
+            name="Test User",
+            password="newuserpass"
+        )
+        self.client = APIClient()
+        self.addCleanup(password_pool.shutdown)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1)
+    def test_login_hashes_on_pool(self):
+        password_pool.shutdown()
+
+        res = self.client.post(reverse("user:login"), {"username": "testuser", "password": "newuserpass"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(password_pool._executor)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_DEPTH=0)
+    def test_full_queue_fails_fast(self):
+        password_pool.shutdown()
+
+        res = self.client.post(reverse("user:login"), {"username": "testuser", "password": "newuserpass"})
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "1")
+        self.assertNotIn("token", res.data)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0)
+    def test_inline(self):
+        pool = PasswordPool()
+        encoded = pool.make_password("secret")
+
+        self.assertEqual(pool.check_password("secret", encoded), (True, False))
+        self.assertEqual(pool.check_password("wrong", encoded), (False, False))
+        self.assertIsNone(pool._executor)
+
+    def test_outdated_hash_upgraded(self):
+        self.user.password = make_password("newuserpass", hasher="pbkdf2_sha1")
+        self.user.save()
+
+        self.assertTrue(self.user.check_password("newuserpass"))
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(self.user.check_password("newuserpass"))
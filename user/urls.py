@@ -1,10 +1,12 @@
 from django.urls import path
-from .views import RegisterView, ManageUserView, LoginView
+from .views import RegisterView, ManageUserView, LoginView, LogoutView, RecommendationsView
 
 app_name = 'user'
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
-    path('me/', ManageUserView.as_view(), name='me')
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('me/', ManageUserView.as_view(), name='me'),
+    path('me/recommendations/', RecommendationsView.as_view(), name='recommendations'),
 ]
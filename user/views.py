@@ -1,23 +1,88 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .authentication import CachingTokenAuthentication, token_cache
 from .serializers import UserSerializer, AuthTokenSerializer, UpdateUserSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
 
+from my_app.models import Book
+from my_app.recommendations import CANDIDATES, cached_recommendations
+from my_app.serializers import RecommendedBookSerializer
+from my_app.throttling import TokenBucketThrottle
+
 # REGISTER USER
 class RegisterView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "register"
 
 # RETIEVE UPDATE USER
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UpdateUserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachingTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+
+        # request.user may be a cached copy up to TOKEN_CACHE_TTL old: update
+        # the stored row, so a save can't write back a stale password or
+        # is_active changed by another process.
+        user = get_user_model().objects.filter(pk=self.request.user.pk, is_active=True).first()
+        if user is None:
+            token_cache.invalidate_user(self.request.user.pk)
+            raise AuthenticationFailed("User inactive or deleted.")
+        return user
 
 # LOGIN VIEW
 class LoginView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "login"
+
+# LOGOUT VIEW
+class LogoutView(APIView):
+    """Delete the request's token, signing it out everywhere it is used."""
+    authentication_classes = [CachingTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if request.auth is not None:
+            request.auth.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+# RECOMMENDATIONS
+class RecommendationsView(generics.ListAPIView):
+    """
+    The `?limit=` books the user hasn't reviewed that their own ratings
+    predict they'd rate highest, from the precomputed similar books table.
+    The ranking is cached per user until they next write a review.
+    """
+    serializer_class = RecommendedBookSerializer
+    authentication_classes = [CachingTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= CANDIDATES:
+            raise ValidationError({"limit": f"Must be between 1 and {CANDIDATES}."})
 
+        ranked = cached_recommendations(request.user.id)[:limit]
+        related = self.get_serializer().get_select_related()
+        books = Book.objects.select_related(*related).in_bulk([book_id for book_id, _ in ranked])
 
+        recommended = []
+        for book_id, score in ranked:
+            if book_id in books:
+                books[book_id].recommendation_score = score
+                recommended.append(books[book_id])
 
+        return Response(self.get_serializer(recommended, many=True).data)